@@ -2,16 +2,262 @@
 Modulo API encargado de habilitar y gestionar las llamadas al backend.
 """
 
+import hashlib
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+
 # Flask
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, request, stream_with_context
 from flask_cors import CORS
 
 # Gestion de funciones
-from data_manager import DataManager  # pylint: disable=E0401
+from http_compression import compress_response  # pylint: disable=E0401
+from data_manager import (  # pylint: disable=E0401
+    CACHE_DIR,
+    DataManager,
+    model_pool,
+    rate_tickers,
+    response_version,
+)
+from disk_cache import DiskCache  # pylint: disable=E0401
+from job_manager import Job, JobManager  # pylint: disable=E0401
+from log_config import configure_logging  # pylint: disable=E0401
+from metrics import (  # pylint: disable=E0401
+    METRICS_CONTENT_TYPE,
+    http_request_seconds,
+    registry,
+    stage_seconds,
+)
+from prefetch import PREFETCH_ENABLED, PrefetchScheduler  # pylint: disable=E0401
+from rate_limiter import alphavantage_bucket  # pylint: disable=E0401
+from response_cache import ResponseCache  # pylint: disable=E0401
+from serializer import (  # pylint: disable=E0401
+    JSON_MIMETYPE,
+    SSE_MIMETYPE,
+    embed_json,
+    sse_event,
+    to_json,
+    to_sse,
+)
+from single_flight import SingleFlight  # pylint: disable=E0401
 
 # Flask App
+configure_logging()
+logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
+# Peticiones en curso por ticker, compartidas entre los clientes concurrentes
+peticiones_en_curso = SingleFlight()
+# Respuestas de /api/datos ya calculadas, en memoria del worker y en disco
+respuestas_cacheadas = ResponseCache(
+    DiskCache(
+        CACHE_DIR + "/responses",
+        max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    )
+)
+# Trabajos en segundo plano (calculos enviados a /api/trabajos)
+trabajos = JobManager()
+# Numero maximo de tickers por peticion de lote
+MAX_TICKERS_LOTE = 1000
+# Segundos que puede esperar como maximo una consulta de un trabajo (long polling)
+MAX_ESPERA_TRABAJO = 30
+
+
+def recargar_modelo():
+    """
+    Función que recarga el modelo desde su fichero sin reiniciar el proceso.
+    """
+    model_pool.reload()
+    logger.info("Modelo recargado", extra={"version": model_pool.version[:12]})
+
+
+def gestionar_sighup(*_):
+    """
+    Función que atiende la señal SIGHUP (kill -HUP <pid>), enviada tras sustituir
+    gb_model.joblib. La recarga se hace en otro hilo para no bloquear el hilo principal
+    si este tenia adquirido el cerrojo del pool.
+    """
+    threading.Thread(target=recargar_modelo, daemon=True).start()
+
+
+# Las señales solo pueden registrarse desde el hilo principal (y SIGHUP no existe en Windows)
+if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+    signal.signal(signal.SIGHUP, gestionar_sighup)
+
+
+def calcular_respuesta(ticker: str, historial: bool = False) -> dict:
+    """
+    Función que ejecuta todas las etapas de DataManager para un ticker y devuelve la
+    respuesta (o el diccionario de error de la descarga). Con historial, la respuesta
+    incluye la calificacion de cada trimestre.
+    """
+    return DataManager(ticker).run(rating_history=historial)
+
+
+def calcular_respuesta_compartida(ticker: str, historial: bool = False) -> dict:
+    """
+    Función que calcula la respuesta de un ticker compartiendo el calculo con las
+    peticiones concurrentes del mismo ticker.
+    """
+    return peticiones_en_curso.do(
+        (ticker.upper(), historial), calcular_respuesta, ticker, historial
+    )
+
+
+def obtener_respuesta_serializada(ticker: str, historial: bool = False) -> bytes:
+    """
+    Función que devuelve la respuesta de un ticker serializada a JSON. Si los datos del
+    ticker y el modelo no han cambiado desde que se calculó, se devuelve la guardada en la
+    cache de respuestas; en otro caso se calcula y se guarda (salvo los errores).
+    """
+    clave = (ticker.upper(), historial)
+    cuerpo = respuestas_cacheadas.get(clave, response_version(ticker))
+    if cuerpo is None:
+        respuesta = calcular_respuesta_compartida(ticker, historial)
+        cuerpo = guardar_respuesta(clave, respuesta)
+        if "Error" in respuesta:
+            return cuerpo
+    # Solo se cuentan para el precalculo las consultas de tickers validos
+    precalculo.record(ticker)
+    return cuerpo
+
+
+def guardar_respuesta(clave: tuple, respuesta: dict) -> bytes:
+    """
+    Función que serializa la respuesta calculada para la clave (ticker, historial) y la
+    guarda en la cache de respuestas, salvo que sea un error.
+    """
+    with stage_seconds.time(stage="serialize"):
+        cuerpo = to_json(respuesta)
+    # La version se obtiene tras el calculo, que puede haber descargado datos nuevos
+    version = response_version(clave[0])
+    if "Error" not in respuesta and version is not None:
+        respuestas_cacheadas.set(clave, version, cuerpo)
+    return cuerpo
+
+
+def precalcular_respuesta(ticker: str) -> bool:
+    """
+    Función que calcula y guarda en la cache la respuesta de un ticker si no está al día
+    ni se está calculando. Las descargas no esperan al limitador de la API y dejan libres
+    los tokens reservados para los usuarios. Devuelve si se ha calculado la respuesta.
+    """
+    clave = (ticker.upper(), False)
+    if respuestas_cacheadas.is_fresh(
+        clave, response_version(ticker)
+    ) or peticiones_en_curso.in_flight(clave):
+        return False
+    respuesta = DataManager(ticker, rate_limit_reserve=precalculo.reserve).run()
+    if "Error" in respuesta:
+        raise RuntimeError(respuesta["Error"])
+    guardar_respuesta(clave, respuesta)
+    return True
+
+
+# Precalculo en segundo plano de los tickers mas consultados. Su hilo se lanza con la
+# primera peticion del worker (no al importar el modulo) y nunca en modo de pruebas
+precalculo = PrefetchScheduler(precalcular_respuesta, alphavantage_bucket)
+
+
+def etiqueta_respuesta(version: str, historial: bool) -> str:
+    """
+    Función que devuelve el ETag de una respuesta a partir de su version (ver
+    response_version), que solo cambia al cambiar los datos o el modelo y se conoce sin
+    calcular la respuesta. Devuelve None si no hay version (datos sin descargar).
+    """
+    if version is None:
+        return None
+    return hashlib.sha256(f"{version}|{historial}".encode("utf-8")).hexdigest()[:32]
+
+
+def respuesta_json(ticker: str, historial: bool = False) -> Response:
+    """
+    Función que devuelve la respuesta serializada de un ticker con un ETag (ver
+    etiqueta_respuesta). Si el cliente ya tiene la version actual (If-None-Match) se
+    devuelve un 304 sin calcular ni leer la respuesta. El ETag es debil porque el cuerpo
+    puede enviarse comprimido con distintas codificaciones.
+    """
+    clave = (ticker.upper(), historial)
+    etiqueta = etiqueta_respuesta(response_version(ticker), historial)
+    if etiqueta is not None and request.if_none_match.contains_weak(etiqueta):
+        precalculo.record(ticker)
+        response = Response(status=304)
+    else:
+        response = Response(
+            obtener_respuesta_serializada(ticker, historial), mimetype=JSON_MIMETYPE
+        )
+        # El calculo puede haber descargado datos nuevos; los errores no llevan ETag
+        version = response_version(ticker)
+        etiqueta = (
+            etiqueta_respuesta(version, historial)
+            if respuestas_cacheadas.is_fresh(clave, version)
+            else None
+        )
+    if etiqueta is not None:
+        response.set_etag(etiqueta, weak=True)
+    # El navegador guarda la respuesta pero la revalida en cada consulta
+    response.cache_control.no_cache = True
+    return response
+
+
+def respuesta_trabajo(trabajo: Job) -> Response:
+    """
+    Función que devuelve la respuesta JSON con el estado de un trabajo. La respuesta de
+    un trabajo terminado ya está serializada (ver obtener_respuesta_serializada), y se
+    incluye en el JSON sin volver a decodificarla.
+    """
+    estado = trabajo.as_dict()
+    cuerpo = estado.pop("respuesta", None)
+    if cuerpo is None:
+        return Response(to_json(estado), mimetype=JSON_MIMETYPE)
+    return Response(embed_json(estado, "respuesta", cuerpo), mimetype=JSON_MIMETYPE)
+
+
+@app.before_request
+def iniciar_peticion():
+    """
+    Función que guarda el instante de inicio de cada petición para medir su duración y,
+    en la primera petición del worker, lanza el precálculo en segundo plano.
+    """
+    g.inicio = time.perf_counter()
+    if PREFETCH_ENABLED and not app.testing:
+        precalculo.start()
+
+
+@app.after_request
+def comprimir_respuesta(response: Response) -> Response:
+    """
+    Función que comprime las respuestas con la codificación que acepte el cliente.
+    """
+    return compress_response(response, request.accept_encodings)
+
+
+@app.after_request
+def registrar_peticion(response: Response) -> Response:
+    """
+    Función que registra la duración de cada petición por ruta, método y estado (en las
+    respuestas en streaming, hasta que empieza el envío).
+    """
+    http_request_seconds.observe(
+        time.perf_counter() - g.get("inicio", time.perf_counter()),
+        endpoint=request.url_rule.rule if request.url_rule else "desconocida",
+        method=request.method,
+        status=response.status_code,
+    )
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+def metricas():
+    """
+    Función que expone las métricas del proceso en el formato de texto de Prometheus.
+    """
+
+    return Response(registry.render(), content_type=METRICS_CONTENT_TYPE)
 
 
 @app.route("/api/datos", methods=["POST"])
@@ -21,23 +267,142 @@ def obtener_datos():
     """
 
     contenido = request.json
-    data_manager = DataManager(contenido["ticker"])
-
-    # Obtener los datos financieros
-    fundamentals = data_manager.download_financial_data()
-    if "Error" in fundamentals:
-        return jsonify(fundamentals), 200
-
-    # Preparar los datos
-    data_manager.preprocess_financial_data()
-    # Hacer las predicciones
-    data_manager.make_predictions()
-    # Calcular nota
-    data_manager.calculate_rating()
-    # Preparar la respuesta
-    data_manager.prepare_response()
-
-    return jsonify(data_manager.respuesta), 200
+
+    # Las peticiones concurrentes del mismo ticker comparten un unico calculo
+    return respuesta_json(contenido["ticker"], bool(contenido.get("historial", False)))
+
+
+@app.route("/api/datos/<ticker>", methods=["GET"])
+def obtener_datos_ticker(ticker: str):
+    """
+    Función equivalente a obtener_datos mediante GET, para que el navegador pueda guardar
+    la respuesta y revalidarla con If-None-Match. Con ?historial=1 se incluye el historial
+    de calificaciones.
+    """
+
+    historial = request.args.get("historial", "0").lower() in ("1", "true")
+
+    return respuesta_json(ticker, historial)
+
+
+@app.route("/api/datos/<ticker>", methods=["DELETE"])
+def invalidar_datos_ticker(ticker: str):
+    """
+    Función que elimina de la cache las respuestas guardadas de un ticker, para forzar
+    su cálculo en la siguiente petición.
+    """
+
+    respuestas_cacheadas.invalidate((ticker.upper(), False), (ticker.upper(), True))
+
+    return Response(status=204)
+
+
+@app.route("/api/datos/<ticker>/eventos", methods=["GET"])
+def obtener_datos_eventos(ticker: str):
+    """
+    Función que envía los datos de un ticker como Server-Sent Events según termina cada
+    etapa de DataManager (ver DataManager.run_stages), para que el frontend pueda mostrar
+    los datos financieros sin esperar a las predicciones. El último evento es "fin"; si
+    la descarga o alguna etapa falla se envía un evento "error" con el mensaje. Si la
+    respuesta está al día en la cache, se envía solo el evento "fin" con la respuesta, y
+    en otro caso la respuesta calculada se guarda en la cache al terminar.
+    """
+
+    historial = request.args.get("historial", "0").lower() in ("1", "true")
+    clave = (ticker.upper(), historial)
+
+    def generar_eventos():
+        cuerpo = respuestas_cacheadas.get(clave, response_version(ticker))
+        if cuerpo is not None:
+            precalculo.record(ticker)
+            yield sse_event("fin", cuerpo)
+            return
+        manager = DataManager(ticker)
+        try:
+            for etapa, datos in manager.run_stages(historial):
+                yield to_sse(etapa, datos)
+        except Exception:  # pylint: disable=W0718
+            # Datos incompletos del ticker: el cliente recibe el error en lugar de un corte
+            yield to_sse("error", {"Error": f"Ticker ({ticker}) could not be rated"})
+        else:
+            if manager.respuesta:
+                guardar_respuesta(clave, manager.respuesta)
+                precalculo.record(ticker)
+        yield to_sse("fin", {})
+
+    response = Response(stream_with_context(generar_eventos()), mimetype=SSE_MIMETYPE)
+    response.cache_control.no_cache = True
+    # Evita que un proxy (nginx) acumule los eventos antes de enviarlos
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.route("/api/trabajos", methods=["POST"])
+def crear_trabajo():
+    """
+    Función que envía el cálculo de un ticker a segundo plano y devuelve inmediatamente el
+    identificador del trabajo, que se consulta en /api/trabajos/<id>. Las peticiones del
+    mismo ticker mientras el trabajo no ha terminado reciben el mismo trabajo.
+    """
+
+    contenido = request.json
+    ticker = contenido["ticker"]
+    historial = bool(contenido.get("historial", False))
+    try:
+        trabajo = trabajos.submit(
+            (ticker.upper(), historial),
+            obtener_respuesta_serializada,
+            ticker,
+            historial,
+        )
+    except queue.Full:
+        error = {"Error": "Too many pending jobs, retry later"}
+        response = Response(to_json(error), mimetype=JSON_MIMETYPE)
+        response.headers["Retry-After"] = str(MAX_ESPERA_TRABAJO)
+        return response, 503
+
+    response = respuesta_trabajo(trabajo)
+    response.headers["Location"] = f"/api/trabajos/{trabajo.id}"
+    return response, 202
+
+
+@app.route("/api/trabajos/<trabajo_id>", methods=["GET"])
+def consultar_trabajo(trabajo_id: str):
+    """
+    Función que devuelve el estado de un trabajo y, si ha terminado, su respuesta. Con
+    ?espera=<segundos> la petición espera a que termine (como mucho MAX_ESPERA_TRABAJO
+    segundos). Devuelve 202 si el trabajo no ha terminado y 404 si no existe o ha caducado.
+    """
+
+    espera = min(request.args.get("espera", 0, type=float), MAX_ESPERA_TRABAJO)
+    trabajo = trabajos.wait(trabajo_id, timeout=espera)
+    if trabajo is None:
+        error = {"Error": f"Job ({trabajo_id}) not found"}
+        return Response(to_json(error), mimetype=JSON_MIMETYPE), 404
+
+    return respuesta_trabajo(trabajo), 200 if trabajo.done else 202
+
+
+@app.route("/api/lote", methods=["POST"])
+def obtener_lote():
+    """
+    Función para calificar una lista de tickers en una sola petición (ver rate_tickers:
+    los tickers que terminan a la vez se califican juntos). La respuesta se envía en
+    streaming (una línea JSON por ticker) según termina cada ticker.
+    """
+
+    tickers = request.json.get("tickers")
+    if not isinstance(tickers, list) or not 0 < len(tickers) <= MAX_TICKERS_LOTE:
+        error = {"Error": f"tickers must be a list of 1-{MAX_TICKERS_LOTE} symbols"}
+        return Response(to_json(error), mimetype=JSON_MIMETYPE), 400
+
+    def generar_lineas():
+        for ticker, respuesta in rate_tickers(tickers):
+            yield to_json({"ticker": ticker, "respuesta": respuesta}) + b"\n"
+
+    return Response(
+        stream_with_context(generar_lineas()), mimetype="application/x-ndjson"
+    )
 
 
 if __name__ == "__main__":
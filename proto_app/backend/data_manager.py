@@ -3,23 +3,39 @@ Modulo encargado de la gestion de la clase DataManager
 """
 
 # pylint: disable=E0401
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
-from typing import Union
+from functools import lru_cache, partial
+from typing import Iterator, Union
 from datetime import datetime, timedelta
+import hashlib
 import json
+import logging
 import os
-import time
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
-import numpy as np
-from joblib import load
+from joblib import Parallel, delayed
+from disk_cache import DiskCache
+from metrics import alphavantage_request_seconds, cache_requests, stage_seconds
+from model_pool import ModelPool
+from rate_limiter import request_with_rate_limit
+from rating_engine import (
+    GROWTH_ATTRIBUTES,
+    RATIO_THRESHOLDS,
+    rate_history,
+    rate_universe,
+    rating_as_dict,
+)
 from data_manager_aux import (
-    closest_price_from_df,
-    replace_values_in_nested_dict,
-    ratio_calculation,
-    geometric_mean_growth_rate,
-    score_for_ratio,
+    join_statements,
+    closest_prices_from_df,
+    compute_ratios,
+    fit_and_predict,
+    predict_rows,
+    row_hashes,
+    rows_fingerprint,
 )
 
 
@@ -32,16 +48,67 @@ FINANCIAL_DATA_ATTRIBUTES: tuple = (
     "OVERVIEW",
 )
 FUNDAMENTAL_ATTRIBUTES: tuple = ("INCOME_STATEMENT", "BALANCE_SHEET", "CASH_FLOW")
+ALPHAVANTAGE_URL = "https://www.alphavantage.co/query"
+REQUEST_TIMEOUT: int = 30
+# TTL (segundos) de la cache de AlphaVantage por funcion: los fundamentales solo cambian
+# una vez por trimestre, mientras que el precio del mes en curso se actualiza a diario
+ALPHAVANTAGE_CACHE_TTL: dict = {
+    "TIME_SERIES_MONTHLY_ADJUSTED": 12 * 3600,
+    "INCOME_STATEMENT": 7 * 24 * 3600,
+    "BALANCE_SHEET": 7 * 24 * 3600,
+    "CASH_FLOW": 7 * 24 * 3600,
+    "OVERVIEW": 24 * 3600,
+}
+# Modos del walk-forward: cada cuantos trimestres se reentrena el modelo
+WALK_FORWARD_MODES: dict = {"exact": 1, "fast": 4}
+WALK_FORWARD_MODE = os.getenv("WALK_FORWARD_MODE", "exact")
+# Procesos con los que se reparten los reentrenamientos del walk-forward (1: en serie)
+WALK_FORWARD_JOBS = int(os.getenv("WALK_FORWARD_JOBS", "1"))
+# Motor de inferencia del modelo: predict de scikit-learn o el ensemble compilado
+# (tree_inference), que da los mismos resultados y es mas rapido para pocas filas
+INFERENCE_ENGINES: tuple = ("sklearn", "compiled")
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "sklearn")
+# Tickers que se califican a la vez en las peticiones por lotes
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+# TTL (segundos) de la cache de predicciones del walk-forward: las claves dependen del
+# contenido de los datos y de la version del modelo, por lo que nunca quedan obsoletas
+PREDICTIONS_CACHE_TTL: int = 90 * 24 * 3600
+CACHE_DIR = os.getenv("CACHE_DIR", str(Path(__file__).resolve().parents[0]) + "/.cache")
 CONFIG_PATH = str(Path(__file__).resolve().parents[0]) + "/config.json"
-if os.path.exists(CONFIG_PATH):
-    with open(CONFIG_PATH, "r", encoding="utf-8") as file:
-        config = json.load(file)
-else:
-    api_key = os.getenv("API_KEY")
-    config = {"Alphavantage_key": api_key}
-# Modelo ML
-MODEL_PATH = str(Path(__file__).resolve().parents[0]) + "/gb_model.joblib"
-model = load(MODEL_PATH)
+# Modelo ML: se carga en la primera prediccion, no al importar el modulo
+MODEL_PATH = os.getenv(
+    "MODEL_PATH", str(Path(__file__).resolve().parents[0]) + "/gb_model.joblib"
+)
+# Cada peticion entrena su propia copia del modelo cargado
+model_pool = ModelPool(MODEL_PATH)
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_config() -> dict:
+    """
+    Funcion que devuelve la configuracion del backend (clave de la API), leyendola la
+    primera vez que se necesita.
+    """
+    if os.path.exists(CONFIG_PATH):
+        with open(CONFIG_PATH, "r", encoding="utf-8") as file:
+            return json.load(file)
+    return {"Alphavantage_key": os.getenv("API_KEY")}
+
+
+# Sesion HTTP compartida: reutiliza las conexiones keep-alive entre descargas concurrentes
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_maxsize=len(FINANCIAL_DATA_ATTRIBUTES)))
+# Cache en disco de las respuestas de AlphaVantage, compartida entre workers
+alphavantage_cache = DiskCache(
+    CACHE_DIR + "/alphavantage",
+    max_bytes=int(os.getenv("ALPHAVANTAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+)
+# Cache en disco de las predicciones de cada paso del walk-forward
+predictions_cache = DiskCache(
+    CACHE_DIR + "/predictions",
+    max_bytes=int(os.getenv("PREDICTIONS_CACHE_MAX_BYTES", str(128 * 1024 * 1024))),
+)
 
 
 @dataclass
@@ -51,10 +118,14 @@ class DataManager:
     así como la preparación de la respuesta.
     :ticker: este parametro es una string con el que buscaremos los datos financieros
     referentes a una empresa
+    :rate_limit_reserve: tokens del limitador de la API que deben quedar libres tras cada
+    descarga, para las descargas en segundo plano: no esperan al limitador y fallan si no
+    quedan tokens libres. Con None (peticiones de usuarios) se espera a tener token
     """
 
     # Variables de entrada
     ticker: str
+    rate_limit_reserve: float = None
 
     # Diccionario donde se almacenara toda la informacion de la respuesta
     respuesta: dict = field(default_factory=dict)
@@ -62,6 +133,8 @@ class DataManager:
     __financial_data: dict = field(default_factory=dict)
     # Diccionario con los resultados del estudio financiero y calificacion
     __calification_data: int = field(default_factory=dict)
+    # Diccionario trimestre -> calificacion, solo si se pide el historial
+    __rating_history: dict = field(default_factory=dict)
     # Diccionario de predicciones realizadas por el modelo
     __predictions_data: dict = field(default_factory=dict)
     # Dataframe con datos cuatrimestrales fundamentales
@@ -72,79 +145,122 @@ class DataManager:
     __prices_df: pd.DataFrame = field(default_factory=pd.DataFrame)
     # Lista de predicciones para formar __predictions_data
     __predictions: list = field(default_factory=list)
-    # Clave de acceso API
-    __alpha_vantage_key = config["Alphavantage_key"]
 
     # Metodos principales
 
-    def download_financial_data(self) -> dict:
+    def run(self, rating_history: bool = False) -> dict:
+        """
+        Metodo que ejecuta todas las etapas para el ticker: descarga, preprocesamiento,
+        predicciones, calificacion y preparacion de la respuesta. Devuelve la respuesta, o
+        el diccionario de error de la descarga.
+        :rating_history: si es True, se calcula tambien la calificacion de cada trimestre
+        """
+        for stage, data in self.run_stages(rating_history):
+            if stage == "error":
+                return data
+        return self.respuesta
+
+    def run_stages(self, rating_history: bool = False) -> Iterator[tuple]:
+        """
+        Metodo que ejecuta las mismas etapas que run, devolviendo las tuplas (etapa, datos)
+        segun termina cada una: "datos_financieros" (fundamentales y overview), "series"
+        (precio de cada trimestre), "predicciones", "calificacion" y, si se pide,
+        "historial_calificacion". Si la descarga falla solo se devuelve ("error", datos).
+        Al terminar, self.respuesta contiene la respuesta completa.
+        :rating_history: si es True, se calcula tambien la calificacion de cada trimestre
+        """
+        # Obtener los datos financieros
+        fundamentals = self.download_financial_data()
+        if "Error" in fundamentals:
+            yield "error", fundamentals
+            return
+        yield "datos_financieros", {
+            element: data
+            for element, data in fundamentals.items()
+            if element != "TIME_SERIES_MONTHLY_ADJUSTED"
+        }
+
+        # Preparar los datos
+        self.preprocess_financial_data()
+        yield "series", {"TIME_SERIES_MONTHLY_ADJUSTED": self.price_series()}
+        # Hacer las predicciones
+        self.make_predictions()
+        yield "predicciones", self.predictions_by_date()
+        # Calcular nota
+        yield "calificacion", self.calculate_rating()
+        if rating_history:
+            yield "historial_calificacion", self.calculate_rating_history()
+        # Preparar la respuesta
+        self.prepare_response()
+
+    @stage_seconds.time(stage="download")
+    def download_financial_data(
+        self, concurrent: bool = True, use_cache: bool = True
+    ) -> dict:
         """
         Metodo para la obtencion del historial de precios y los fundamentales de una empresa.
         Devuelve el diccionario con toda la informacion descargada, y en caso de que no
         encuentre el simbolo, devuelve KeyError.
+        :concurrent: si es True, tras la descripcion general (OVERVIEW) el resto de llamadas
+        a la API se lanzan a la vez sobre la sesion compartida; si es False, se descargan
+        una tras otra.
+        :use_cache: si es False, se ignoran las entradas de la cache y se fuerza la descarga
+        (el resultado se sigue guardando en la cache).
         """
 
-        print(f"Obteniendo los datos de {self.ticker}")
-        # Obtención de fundamentales y precios
+        logger.info("Obteniendo los datos", extra={"ticker": self.ticker})
+        # Obtención de fundamentales y precios. La descripcion general se descarga antes
+        # que el resto: si el ticker no existe viene vacia y no se gastan mas llamadas
+        rest = tuple(e for e in FINANCIAL_DATA_ATTRIBUTES if e != "OVERVIEW")
         try:
-            for element in FINANCIAL_DATA_ATTRIBUTES:
-                print(f"{element} descargado")
-                url = f"https://www.alphavantage.co/query?function={element}&symbol={self.ticker}&apikey={self.__alpha_vantage_key}"  # pylint: disable=C0301
-                r = requests.get(url, timeout=1000)
-                downloaded = r.json()
-                if not downloaded:
-                    print(f"Información sobre {self.ticker} no disponible")
-                    self.__financial_data = {
-                        "Error": f"Ticker ({self.ticker}) data not available"
-                    }
-                    break
-                # Caso de superar el limite de acccesos por minuto de la API
-                while "Note" in downloaded:
-                    print("Waiting for 20 seconds for AlphaVantage API limit!")
-                    time.sleep(20)
-                    r = requests.get(url, timeout=1000)
-                    downloaded = r.json()
-
-                self.__financial_data[element] = downloaded
+            overview = self.__download_element("OVERVIEW", use_cache=use_cache)
+            if not overview:
+                self.__data_not_available("OVERVIEW")
+                return self.__financial_data
+            with ThreadPoolExecutor(
+                max_workers=len(rest) if concurrent else 1
+            ) as executor:
+                # executor.map devuelve los resultados en el orden de rest
+                downloads = executor.map(
+                    partial(self.__download_element, use_cache=use_cache), rest
+                )
+                for element, downloaded in zip(rest, downloads):
+                    if not downloaded:
+                        self.__data_not_available(element)
+                        executor.shutdown(cancel_futures=True)
+                        break
+                    self.__financial_data[element] = downloaded
+                else:
+                    self.__financial_data["OVERVIEW"] = overview
 
         except requests.exceptions.JSONDecodeError:
             self.__financial_data = {
                 "Error": f"Información sobre {self.ticker} no disponible"
             }
+        except TimeoutError:
+            self.__financial_data = {
+                "Error": f"AlphaVantage API limit reached for ticker ({self.ticker})"
+            }
         return self.__financial_data
 
+    @stage_seconds.time(stage="preprocess")
     def preprocess_financial_data(self) -> pd.DataFrame:
         """
         Metodo para el preprocesamiento, preparación y limpieza de los datos financieros.
         Devuelve un dataframe con toda la información necesaria para pasarsela al modelo.
         """
-        print("Preparando los datos para ingestión del modelo")
-
-        # Crear un DataFrame a partir de los datos financieros
-        self.__financial_df = None
-        for element in FUNDAMENTAL_ATTRIBUTES:
-            # Convertimos los datos de cada elemento a df
-            element_df = pd.DataFrame(
-                self.__financial_data[element]["quarterlyReports"]
-            )
-            element_df.sort_values(by="fiscalDateEnding", inplace=True)
-            element_df.reset_index(drop=True, inplace=True)
-            # Añadimos al df final de resultados
-            if self.__financial_df is None:
-                self.__financial_df = element_df
-            else:
-                self.__financial_df = pd.merge(
-                    self.__financial_df,
-                    element_df,
-                    on="fiscalDateEnding",
-                    how="left",
-                    suffixes=("", "_drop"),
-                )
-        drop_cols = [
-            col for col in self.__financial_df.columns if col.endswith("_drop")
-        ]
-        self.__financial_df = self.__financial_df.drop(columns=drop_cols)
-        self.__financial_df = self.__financial_df.apply(pd.to_numeric, errors="ignore")
+        logger.info(
+            "Preparando los datos para ingestión del modelo",
+            extra={"ticker": self.ticker},
+        )
+
+        # Crear un DataFrame a partir de los datos financieros, unidos por fiscalDateEnding
+        self.__financial_df = join_statements(
+            {
+                element: self.__financial_data[element]["quarterlyReports"]
+                for element in FUNDAMENTAL_ATTRIBUTES
+            }
+        )
 
         # Gestion de los precios: __prices_df
         adjusted_close = {
@@ -158,94 +274,30 @@ class DataManager:
 
         # Gestion de los precios: __financial_df
         self.__prices_df.index = pd.to_datetime(self.__prices_df.index)
-        self.__financial_df["fiscalDateEnding"] = pd.to_datetime(
-            self.__financial_df["fiscalDateEnding"]
-        )
-        self.__financial_df["sharePrice"] = self.__financial_df[
-            "fiscalDateEnding"
-        ].apply(
-            lambda date: closest_price_from_df(
-                prices_df=self.__prices_df, fecha_objetivo=date
-            )
-        )
-        self.__financial_df["1y_sharePrice"] = self.__financial_df[
-            "fiscalDateEnding"
-        ].apply(
-            lambda date: closest_price_from_df(
-                prices_df=self.__prices_df, fecha_objetivo=date + timedelta(days=365)
-            )
-        )
-        self.__financial_df = self.__financial_df.apply(pd.to_numeric, errors="ignore")
+        # Precio al cierre del trimestre y un año despues, alineados en una sola llamada
+        fechas = self.__financial_df["fiscalDateEnding"]
+        precios, precios_1y = closest_prices_from_df(
+            prices=self.__prices_df["TIME_SERIES_MONTHLY_ADJUSTED"],
+            fechas_objetivo=pd.concat([fechas, fechas + timedelta(days=365)]),
+        ).reshape(2, -1)
+        self.__financial_df["sharePrice"] = precios
+        self.__financial_df["1y_sharePrice"] = precios_1y
         # Calculos de los ratios necesarios
-        self.__financial_df["EPS"] = self.__financial_df.apply(
-            lambda row: ratio_calculation(
-                operation=lambda: row["netIncome"] / row["commonStock"], default=np.nan
-            ),
-            axis=1,
-        )
-        self.__financial_df["P/E"] = self.__financial_df.apply(
-            lambda row: ratio_calculation(
-                operation=lambda: row["sharePrice"] / row["EPS"], default=np.nan
-            ),
-            axis=1,
-        )
-        self.__financial_df["ROE"] = self.__financial_df.apply(
-            lambda row: ratio_calculation(
-                operation=lambda: row["netIncome"] / row["totalShareholderEquity"],
-                default=np.nan,
-            ),
-            axis=1,
-        )
-        self.__financial_df["ROA"] = self.__financial_df.apply(
-            lambda row: ratio_calculation(
-                operation=lambda: row["netIncome"] / row["totalAssets"], default=np.nan
-            ),
-            axis=1,
-        )
-        self.__financial_df["bookValue"] = self.__financial_df.apply(
-            lambda row: ratio_calculation(
-                operation=lambda: (row["totalAssets"] - row["totalLiabilities"])
-                / row["commonStockSharesOutstanding"],
-                default=np.nan,
-            ),
-            axis=1,
-        )
-        self.__financial_df["currentRatio"] = self.__financial_df.apply(
-            lambda row: ratio_calculation(
-                operation=lambda: (row["totalCurrentAssets"])
-                / row["totalCurrentLiabilities"],
-                default=np.nan,
-            ),
-            axis=1,
-        )
-        self.__financial_df["debtEquityRatio"] = self.__financial_df.apply(
-            lambda row: ratio_calculation(
-                operation=lambda: (row["totalLiabilities"])
-                / row["totalShareholderEquity"],
-                default=np.nan,
-            ),
-            axis=1,
+        ratios = compute_ratios(self.__financial_df)
+        self.__financial_df[ratios.columns] = ratios
+        # Sector y simbolo
+        self.__financial_df["sector"] = pd.Categorical(
+            [self.__financial_data["OVERVIEW"]["Sector"]] * len(self.__financial_df)
         )
-        self.__financial_df["freeCashFlow"] = self.__financial_df.apply(
-            lambda row: ratio_calculation(
-                operation=lambda: (row["operatingCashflow"])
-                - row["capitalExpenditures"],
-                default=np.nan,
-            ),
-            axis=1,
+        self.__financial_df["symbol"] = pd.Categorical(
+            [self.__financial_data["OVERVIEW"]["Symbol"]] * len(self.__financial_df)
         )
-        # Sector y simbolo
-        self.__financial_df["sector"] = self.__financial_data["OVERVIEW"]["Sector"]
-        self.__financial_df["symbol"] = self.__financial_data["OVERVIEW"]["Symbol"]
 
         # Media del sector anual
-        self.__financial_df["fiscalDateEnding"] = pd.to_datetime(
-            self.__financial_df["fiscalDateEnding"]
-        )
         self.__financial_df["year"] = self.__financial_df["fiscalDateEnding"].dt.year
 
         mean_price_by_sector_year = (
-            self.__financial_df.groupby(["sector", "year"])["sharePrice"]
+            self.__financial_df.groupby(["sector", "year"], observed=True)["sharePrice"]
             .mean()
             .reset_index(name="meanSectorPrice")
         )
@@ -278,9 +330,6 @@ class DataManager:
             "meanSectorPrice",
         ]
         self.__ml_data = self.__financial_df.reindex(columns=columns_required)
-        self.__ml_data.replace(
-            to_replace=[np.inf, -np.inf, "None"], value=np.nan, inplace=True
-        )
 
         # Eliminamos aquellas filas que no tengan información sobre 1y_sharePrice y
         # sean anteriores al dia actual
@@ -292,41 +341,123 @@ class DataManager:
 
         return self.__ml_data
 
-    def make_predictions(self) -> Union[list, int]:
-        # pylint: disable=C0103
+    @stage_seconds.time(stage="predictions")
+    def make_predictions(
+        self,
+        mode: str = WALK_FORWARD_MODE,
+        n_jobs: int = WALK_FORWARD_JOBS,
+        engine: str = INFERENCE_ENGINE,
+    ) -> Union[list, int]:
+        # pylint: disable=C0103,R0914
         """
         Metodo que toma los datos financieros procesados para hacer las predicciones.
         Devuelve una lista de predicciones realizadas.
+        :mode: modo del walk-forward (ver WALK_FORWARD_MODES). "exact" reentrena el modelo
+        con cada trimestre; "fast" solo cada pocos trimestres (y siempre con el ultimo),
+        prediciendo los trimestres intermedios con el ultimo modelo entrenado.
+        :n_jobs: procesos entre los que se reparten los reentrenamientos, que son
+        independientes entre si. Con 1 se ejecutan en serie; el resultado es el mismo.
+        :engine: motor de inferencia (ver INFERENCE_ENGINES); el resultado es el mismo.
         """
-        print("Realizando predicciones")
-        for i in range(len(self.__ml_data)):
-            temp_model = model  # Modelo temporal para entrenamiento
-            if not np.isnan(self.__ml_data.iloc[i]["1y_sharePrice"]):
-                # Entrenamiento
-                y_train = self.__ml_data.iloc[: i + 1]["1y_sharePrice"]
-                X_train = self.__ml_data.iloc[: i + 1].drop(["1y_sharePrice"], axis=1)
-                temp_model.fit(X_train, y_train)
-                # Prediccion
-                try:
-                    X_next = self.__ml_data.iloc[[i + 1]].drop(
-                        ["1y_sharePrice"], axis=1
-                    )
-                except IndexError:
-                    return self.__predictions, -1
-                y_pred = temp_model.predict(X_next)
-                self.__predictions.append(float(y_pred.item()))
-            else:
-                # Prediccion final
-                X_next = self.__ml_data.iloc[i:].drop(["1y_sharePrice"], axis=1)
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_next)
-                for pred in list(y_pred):
-                    self.__predictions.append(float(pred.item()))
-                break
+        logger.info("Realizando predicciones", extra={"ticker": self.ticker})
+        refit_every = WALK_FORWARD_MODES[mode]
+        compiled = engine == "compiled"
+        X = self.__ml_data.drop(["1y_sharePrice"], axis=1)
+        y = self.__ml_data["1y_sharePrice"]
+        # Trimestres iniciales con el precio a un año conocido (hasta el primero sin el)
+        n_labeled = int(y.isna().to_numpy().argmax()) if y.isna().any() else len(y)
+
+        # Trimestres con los que se reentrena; cada modelo predice los siguientes
+        # trimestres hasta el proximo reentrenamiento
+        fit_points = [
+            i for i in range(n_labeled) if not i % refit_every or i == n_labeled - 1
+        ]
+        steps = []
+        for fit_point, next_fit_point in zip(fit_points, fit_points[1:] + [n_labeled]):
+            next_rows = list(range(fit_point + 1, min(next_fit_point + 1, len(X))))
+            # Prediccion final, con el modelo entrenado con todos los trimestres conocidos
+            if next_fit_point == n_labeled:
+                next_rows += list(range(n_labeled, len(X)))
+            if next_rows:
+                steps.append((fit_point, next_rows))
+
+        # Predicciones ya calculadas en otras peticiones para el mismo tramo de datos. Las
+        # de todos los pasos del ticker se guardan en una sola entrada, indexadas por la
+        # huella de las filas de entrenamiento y de las filas a predecir de cada paso
+        hashes = row_hashes(self.__ml_data)
+        cache_key = (
+            "PREDICTIONS",
+            self.ticker.upper(),
+            model_pool.version,
+            ",".join(self.__ml_data.columns),
+        )
+        step_keys = [
+            rows_fingerprint(hashes, slice(0, fit_point + 1))
+            + ":"
+            + rows_fingerprint(hashes, rows)
+            for fit_point, rows in steps
+        ]
+        cached = predictions_cache.get(cache_key, PREDICTIONS_CACHE_TTL) or {}
+        step_predictions = [cached.get(key) for key in step_keys]
+        pending = [
+            i for i, predictions in enumerate(step_predictions) if predictions is None
+        ]
+        cache_requests.inc(len(steps) - len(pending), cache="predictions", result="hit")
+        cache_requests.inc(len(pending), cache="predictions", result="miss")
+        logger.info(
+            "Reentrenamientos reutilizados",
+            extra={
+                "ticker": self.ticker,
+                "reused": len(steps) - len(pending),
+                "steps": len(steps),
+            },
+        )
 
+        # Modelo temporal para entrenamiento, propio de esta peticion (solo se carga el
+        # modelo si queda algun reentrenamiento por calcular)
+        computed = []
+        if pending:
+            with model_pool.model() as temp_model:
+                if n_jobs == 1:
+                    computed = [
+                        fit_and_predict(
+                            temp_model,
+                            X.iloc[: steps[i][0] + 1],
+                            y.iloc[: steps[i][0] + 1],
+                            X.iloc[steps[i][1]],
+                            compiled,
+                        )
+                        for i in pending
+                    ]
+                else:
+                    # Cada proceso recibe su propia copia del modelo
+                    computed = Parallel(n_jobs=n_jobs)(
+                        delayed(fit_and_predict)(
+                            temp_model,
+                            X.iloc[: steps[i][0] + 1],
+                            y.iloc[: steps[i][0] + 1],
+                            X.iloc[steps[i][1]],
+                            compiled,
+                        )
+                        for i in pending
+                    )
+        for i, predictions in zip(pending, computed):
+            step_predictions[i] = predictions
+        if pending:
+            # Solo se conservan los pasos del tramo de datos actual
+            predictions_cache.set(cache_key, dict(zip(step_keys, step_predictions)))
+        for predictions in step_predictions:
+            self.__predictions.extend(predictions)
+
+        if n_labeled == len(X):
+            return self.__predictions, -1
+        if not steps:
+            # Sin trimestres conocidos: prediccion con el modelo pre-entrenado
+            self.__predictions.extend(predict_rows(model_pool.prototype, X, compiled))
         return self.__predictions
 
-    def calculate_rating(self):
+    @stage_seconds.time(stage="rating")
+    def calculate_rating(self, rating: pd.Series = None):
         # pylint: disable = C0301
         """
         Metodo para el calculo del rating en base al retorno de precio esperado y tres factores financieros.
@@ -357,137 +488,85 @@ class DataManager:
                             un 50% o más de un periodo a otro), por ello, se aplica un factor de amplificación de 10.
 
         remarks: debemos tener en cuenta que en algunos casos no contamos con los datos fundamentales, en dicho caso el atributo tomara valor de 0
+
+        :rating: fila del ticker en la tabla de rate_universe, si ya se ha calculado junto a la de otros tickers (ver rate_tickers)
         """
 
-        scores = {
-            "growth": {
-                "totalRevenue": None,
-                "ebitda": None,
-                "freeCashFlow": None,
-                "dividendPayout": None,
-            },
-            "profitability": {
-                "netIncome": None,
-                "ROE": None,
-                "ROA": None,
-                "bookValue": None,
-            },
-            "financialHealth": {
-                "currentRatio": None,
-                "debtEquityRatio": None,
+        if rating is None:
+            history, latest = self.rating_inputs()
+            rating = rate_universe(history, latest).iloc[0]
+        self.__calification_data = rating_as_dict(rating)
+
+        return self.__calification_data
+
+    @stage_seconds.time(stage="rating_history")
+    def calculate_rating_history(self) -> dict:
+        """
+        Metodo para el calculo de la calificacion en cada trimestre con prediccion, con las
+        mismas reglas que calculate_rating pero usando solo los datos disponibles en cada
+        trimestre (informes hasta su fecha, maximo del precio hasta entonces y la prediccion
+        del walk-forward). Devuelve un diccionario trimestre -> calificacion.
+        """
+        history = self.__financial_df[list(GROWTH_ATTRIBUTES)]
+        rated = self.__ml_data.iloc[: len(self.__predictions)]
+        reports = pd.Index(self.__financial_df["fiscalDateEnding"]).get_indexer(
+            rated["fiscalDateEnding"]
+        )
+        last_reports = self.__financial_df.iloc[reports]
+        latest = pd.DataFrame(
+            {
+                "report": reports,
+                "prediction": self.__predictions[: len(rated)],
+                "currentPrice": rated["sharePrice"].to_numpy(),
+                "maxPrice": rated["sharePrice"].cummax().to_numpy(),
+                "sharePrice": last_reports["sharePrice"].to_numpy(),
+                **{ratio: last_reports[ratio].to_numpy() for ratio in RATIO_THRESHOLDS},
             },
-            "pricePredictionReturn": None,
+            index=rated["fiscalDateEnding"].dt.strftime("%Y-%m"),
+        )
+        ratings = rate_history(history, latest)
+        self.__rating_history = {
+            quarter: rating_as_dict(rating) for quarter, rating in ratings.iterrows()
         }
 
-        ratio_values = {
-            "ROE": 0.15,
-            "ROA": 0.05,
-            "currentRatio": 1.0,
-            "debtEquityRatio": 1.0,
-            "bookValue": 1.0,
-        }
+        return self.__rating_history
 
-        # Normalzacion y calculo de la puntuacion de los atributos
-        category_scores = []
-        for category, category_item in scores.items():
-            # Calculo del rating del precio
-            if category == "pricePredictionReturn":
-                price_return = (
-                    (self.__predictions[-1] - self.__ml_data["sharePrice"].iloc[-1])
-                    / self.__predictions[-1]
-                ) * 100
-                scores["pricePredictionReturn"] = max(price_return, 0)
-            # Calculo rating de crecimiento, rentabilidad y salud financiera
-            else:
-                attribute_scores = []
-                for attribute, attribute_item in category_item.items():
-                    # Ratios
-                    if attribute in ratio_values:
-                        attribute_value = self.__financial_df[attribute].iloc[-1]
-                        if not np.isnan(attribute_value):
-                            # Inversa del Debt To Equity
-                            if attribute == "debtEquityRatio":
-                                attribute_value = 1 / attribute_value
-                            # Inversa del Price To Book Value
-                            elif attribute == "bookValue":
-                                attribute_value = 1 / (
-                                    self.__financial_df["sharePrice"].iloc[-1]
-                                    / attribute_value
-                                )
-                            attribute_item = score_for_ratio(
-                                attribute_value, ratio_values[attribute]
-                            )
-                        else:
-                            attribute_item = 0
-                    # Otros Fundamentales
-                    else:
-                        attribute_item = geometric_mean_growth_rate(
-                            self.__financial_df, attribute, 5
-                        )
-                        # Aplicamos factor de amplificacion a gmgr para que tengan peso en la nota
-                        attribute_item = min(max(attribute_item * 10, -100), 100)
-                    attribute_scores.append(attribute_item)
-                    attribute_item = int(attribute_item)
-                    scores[category][attribute] = attribute_item
-                category_scores.append(sum(attribute_scores) / len(attribute_scores))
-
-        # Calcular la puntuación final, entre 0 y 100
-        normilize_factor = (
-            self.__ml_data["sharePrice"].iloc[-1] / self.__ml_data["sharePrice"].max()
+    def rating_inputs(self) -> tuple:
+        """
+        Metodo que devuelve los datos del ticker con los que se calcula su calificacion, en el
+        formato de rating_engine.rate_universe: los informes trimestrales (history) y la fila
+        con la ultima prediccion, precios y ratios (latest). Permite calificar a la vez las
+        empresas de un universo concatenando sus datos.
+        """
+        history = self.__financial_df[list(GROWTH_ATTRIBUTES)].assign(
+            ticker=self.ticker
         )
-        scores["finalRate"] = min(
-            int(
-                scores["pricePredictionReturn"] * normilize_factor
-                + (sum(category_scores) / len(category_scores))
-            ),
-            100,
+        last_report = self.__financial_df.iloc[-1]
+        latest = pd.DataFrame(
+            {
+                "prediction": self.__predictions[-1],
+                "currentPrice": self.__ml_data["sharePrice"].iloc[-1],
+                "maxPrice": self.__ml_data["sharePrice"].max(),
+                "sharePrice": last_report["sharePrice"],
+                **{ratio: last_report[ratio] for ratio in RATIO_THRESHOLDS},
+            },
+            index=pd.Index([self.ticker], name="ticker"),
         )
-        if scores["finalRate"] < 0:
-            scores["finalRate"] = 0
-        self.__calification_data = scores
-
-        return self.__calification_data
+        return history, latest
 
+    @stage_seconds.time(stage="response")
     def prepare_response(self) -> dict:
         """
         Metodo para la preparación de la respuesta. Toma como los datos del dataframe de datos
         financieros y los transforma a diccionarios. Finalmente, junta toda la informacion y
         devuelve el diccionario de la respuesta.
         """
-        # Obtencion del diccionario de _predictions
-        predictions_df = pd.DataFrame(
-            self.__predictions, columns=["predicted_1y_sharePrice"]
-        )
-        predictions_df["fiscalDateEnding"] = self.__ml_data[
-            "fiscalDateEnding"
-        ] + timedelta(days=365)
-        predictions_df["fiscalDateEnding"] = predictions_df[
-            "fiscalDateEnding"
-        ].dt.strftime("%Y-%m")
-        self.__predictions_data = dict(
-            zip(
-                predictions_df["fiscalDateEnding"],
-                predictions_df["predicted_1y_sharePrice"],
-            )
-        )
+        self.__predictions_data = self.predictions_by_date()
 
         # Obtencion del diccionario de TIME_SERIES_MONTHLY_ADJUSTED -> finalizacion
         # del diccionario de __financial_data
-        self.__ml_data["fiscalDateEnding"] = self.__ml_data[
-            "fiscalDateEnding"
-        ].dt.strftime("%Y-%m")
         del self.__financial_data["TIME_SERIES_MONTHLY_ADJUSTED"]
-        self.__financial_data["TIME_SERIES_MONTHLY_ADJUSTED"] = dict(
-            zip(self.__ml_data["fiscalDateEnding"], self.__ml_data["sharePrice"])
-        )
-
-        self.__financial_data["TIME_SERIES_MONTHLY_ADJUSTED"] = (
-            replace_values_in_nested_dict(
-                self.__financial_data["TIME_SERIES_MONTHLY_ADJUSTED"],
-                ["nan", "NaN", "N/A"],
-                "None",
-            )
-        )
+        self.__financial_data["TIME_SERIES_MONTHLY_ADJUSTED"] = self.price_series()
 
         # Preparar la respuesta
         self.respuesta = {
@@ -495,5 +574,191 @@ class DataManager:
             "predicciones": self.__predictions_data,
             "calificacion": self.__calification_data,
         }
+        if self.__rating_history:
+            self.respuesta["historial_calificacion"] = self.__rating_history
 
         return self.respuesta
+
+    def predictions_by_date(self) -> dict:
+        """
+        Metodo que devuelve el diccionario de predicciones: fecha a la que se predice el
+        precio (un año despues de cada trimestre) -> precio predicho.
+        """
+        dates = self.__ml_data["fiscalDateEnding"].iloc[: len(self.__predictions)]
+        return dict(
+            zip((dates + timedelta(days=365)).dt.strftime("%Y-%m"), self.__predictions)
+        )
+
+    def price_series(self) -> dict:
+        """
+        Metodo que devuelve el diccionario trimestre -> precio de la accion al cierre del
+        trimestre. Los precios sin dato (NaN) se serializan como null (ver
+        serializer.to_json).
+        """
+        return dict(
+            zip(
+                self.__ml_data["fiscalDateEnding"].dt.strftime("%Y-%m"),
+                self.__ml_data["sharePrice"],
+            )
+        )
+
+    # Metodos auxiliares
+
+    def __data_not_available(self, element: str):
+        """
+        Metodo auxiliar que registra que una funcion de AlphaVantage ha llegado vacia para
+        el ticker y guarda el error correspondiente como datos financieros.
+        """
+        logger.warning(
+            "Información no disponible",
+            extra={"ticker": self.ticker, "element": element},
+        )
+        self.__financial_data = {"Error": f"Ticker ({self.ticker}) data not available"}
+
+    def __download_element(self, element: str, use_cache: bool = True) -> dict:
+        """
+        Metodo auxiliar para descargar una funcion de AlphaVantage para el ticker.
+        Devuelve el json de la respuesta, consultando antes la cache en disco.
+        """
+        cache_key = (element, self.ticker.upper())
+        if use_cache:
+            cached = alphavantage_cache.get(cache_key, ALPHAVANTAGE_CACHE_TTL[element])
+            cache_requests.inc(
+                cache="alphavantage", result="miss" if cached is None else "hit"
+            )
+            if cached is not None:
+                logger.info(
+                    "Datos obtenidos de la cache",
+                    extra={"ticker": self.ticker, "element": element},
+                )
+                # Las entradas guardadas sin version se versionan al leerlas
+                version_key = ("VERSION", *cache_key)
+                ttl = ALPHAVANTAGE_CACHE_TTL[element]
+                if alphavantage_cache.get(version_key, ttl) is None:
+                    store_data_version(element, self.ticker, cached)
+                return cached
+
+        params = {
+            "function": element,
+            "symbol": self.ticker,
+            "apikey": get_config()["Alphavantage_key"],
+        }
+
+        def request() -> dict:
+            with alphavantage_request_seconds.time(function=element):
+                return session.get(
+                    ALPHAVANTAGE_URL, params=params, timeout=REQUEST_TIMEOUT
+                ).json()
+
+        # Cada intento espera a tener un token del limitador compartido de la API
+        downloaded = request_with_rate_limit(request, reserve=self.rate_limit_reserve)
+        logger.info(
+            "Datos descargados", extra={"ticker": self.ticker, "element": element}
+        )
+        # Solo se guardan las respuestas validas (no vacias ni mensajes de error)
+        if downloaded and not {"Error Message", "Information"} & downloaded.keys():
+            alphavantage_cache.set(cache_key, downloaded)
+            store_data_version(element, self.ticker, downloaded)
+        return downloaded
+
+
+def store_data_version(element: str, ticker: str, data: dict):
+    """
+    Funcion que guarda la version (hash del contenido) de los datos de una funcion de
+    AlphaVantage para un ticker. Caduca a la vez que los datos en la cache.
+    """
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8"))
+    alphavantage_cache.set(("VERSION", element, ticker.upper()), digest.hexdigest())
+
+
+def response_version(ticker: str) -> str:
+    """
+    Funcion que devuelve la version de la respuesta de un ticker sin calcularla: hash de
+    las versiones de sus datos de AlphaVantage y de la version del modelo. Cambia al
+    descargarse datos nuevos o al recargarse el modelo, y es None si falta algun dato en
+    la cache o ha caducado.
+    """
+    versions = [
+        alphavantage_cache.get(
+            ("VERSION", element, ticker.upper()), ALPHAVANTAGE_CACHE_TTL[element]
+        )
+        for element in FINANCIAL_DATA_ATTRIBUTES
+    ]
+    if None in versions:
+        return None
+    return hashlib.sha256(
+        "|".join([*versions, model_pool.version]).encode()
+    ).hexdigest()
+
+
+def rate_tickers(tickers: list, max_workers: int = BATCH_WORKERS) -> Iterator[tuple]:
+    """
+    Funcion para calificar una lista de tickers, devolviendo las tuplas (ticker, respuesta)
+    segun van terminando. La descarga (que respeta el limitador compartido de la API), el
+    preprocesamiento y las predicciones de cada ticker se ejecutan a la vez en un pool de
+    hilos, ya que cada ticker entrena su propio modelo con su historial. Los tickers que
+    terminan a la vez se califican juntos: sus datos se apilan en un unico dataframe y se
+    califican con una sola llamada a rate_universe, cuyo resultado por ticker no depende
+    del resto del lote.
+    :max_workers: numero de tickers que se descargan y predicen a la vez
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {
+            executor.submit(predict_ticker, ticker): ticker
+            for ticker in dict.fromkeys(tickers)
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            predicted = {}
+            for future in done:
+                ticker = pending.pop(future)
+                try:
+                    predicted[ticker] = future.result()
+                except Exception:  # pylint: disable=W0718
+                    # Un ticker con datos incompletos no interrumpe el resto del lote
+                    yield ticker, {"Error": f"Ticker ({ticker}) could not be rated"}
+            yield from rate_predicted(predicted)
+
+
+def predict_ticker(ticker: str) -> Union[DataManager, dict]:
+    """
+    Funcion que descarga, prepara y predice los datos de un ticker. Devuelve el
+    DataManager listo para calificar, o el diccionario de error de la descarga.
+    """
+    dm = DataManager(ticker)
+    fundamentals = dm.download_financial_data()
+    if "Error" in fundamentals:
+        return fundamentals
+    dm.preprocess_financial_data()
+    dm.make_predictions()
+    return dm
+
+
+def rate_predicted(predicted: dict) -> Iterator[tuple]:
+    """
+    Funcion que califica a la vez los tickers ya predichos (ticker -> DataManager o
+    diccionario de error) apilando sus datos, y devuelve las tuplas (ticker, respuesta).
+    """
+    inputs = {}
+    for ticker, dm in predicted.items():
+        if isinstance(dm, dict):
+            yield ticker, dm
+            continue
+        try:
+            inputs[ticker] = dm.rating_inputs()
+        except Exception:  # pylint: disable=W0718
+            yield ticker, {"Error": f"Ticker ({ticker}) could not be rated"}
+    if not inputs:
+        return
+
+    with stage_seconds.time(stage="rating_batch"):
+        ratings = rate_universe(
+            pd.concat([history for history, _ in inputs.values()]),
+            pd.concat([latest for _, latest in inputs.values()]),
+        )
+    for ticker in inputs:
+        try:
+            predicted[ticker].calculate_rating(ratings.loc[ticker])
+            yield ticker, predicted[ticker].prepare_response()
+        except Exception:  # pylint: disable=W0718
+            yield ticker, {"Error": f"Ticker ({ticker}) could not be rated"}
@@ -2,110 +2,357 @@
 Modulo de python donde se guardan las funciones auxiliares empleadas en data_manager.py
 """
 
-from typing import Union
+import hashlib
 import pandas as pd
 import numpy as np
+from metrics import model_seconds  # pylint: disable=E0401
+from tree_inference import CompiledEnsemble  # pylint: disable=E0401
+
+
+# Esquema de tipos de los informes trimestrales de AlphaVantage: columna -> dtype
+NUMERIC_DTYPE = "float64"
+_REPORT_KEYS: dict = {
+    "fiscalDateEnding": "datetime64[ns]",
+    "reportedCurrency": "category",
+}
+STATEMENT_SCHEMAS: dict = {
+    "INCOME_STATEMENT": {
+        **_REPORT_KEYS,
+        **dict.fromkeys(
+            (
+                "grossProfit",
+                "totalRevenue",
+                "costOfRevenue",
+                "costofGoodsAndServicesSold",
+                "operatingIncome",
+                "sellingGeneralAndAdministrative",
+                "researchAndDevelopment",
+                "operatingExpenses",
+                "investmentIncomeNet",
+                "netInterestIncome",
+                "interestIncome",
+                "interestExpense",
+                "nonInterestIncome",
+                "otherNonOperatingIncome",
+                "depreciation",
+                "depreciationAndAmortization",
+                "incomeBeforeTax",
+                "incomeTaxExpense",
+                "interestAndDebtExpense",
+                "netIncomeFromContinuingOperations",
+                "comprehensiveIncomeNetOfTax",
+                "ebit",
+                "ebitda",
+                "netIncome",
+            ),
+            NUMERIC_DTYPE,
+        ),
+    },
+    "BALANCE_SHEET": {
+        **_REPORT_KEYS,
+        **dict.fromkeys(
+            (
+                "totalAssets",
+                "totalCurrentAssets",
+                "cashAndCashEquivalentsAtCarryingValue",
+                "cashAndShortTermInvestments",
+                "inventory",
+                "currentNetReceivables",
+                "totalNonCurrentAssets",
+                "propertyPlantEquipment",
+                "accumulatedDepreciationAmortizationPPE",
+                "intangibleAssets",
+                "intangibleAssetsExcludingGoodwill",
+                "goodwill",
+                "investments",
+                "longTermInvestments",
+                "shortTermInvestments",
+                "otherCurrentAssets",
+                "otherNonCurrentAssets",
+                "totalLiabilities",
+                "totalCurrentLiabilities",
+                "currentAccountsPayable",
+                "deferredRevenue",
+                "currentDebt",
+                "shortTermDebt",
+                "totalNonCurrentLiabilities",
+                "capitalLeaseObligations",
+                "longTermDebt",
+                "currentLongTermDebt",
+                "longTermDebtNoncurrent",
+                "shortLongTermDebtTotal",
+                "otherCurrentLiabilities",
+                "otherNonCurrentLiabilities",
+                "totalShareholderEquity",
+                "treasuryStock",
+                "retainedEarnings",
+                "commonStock",
+                "commonStockSharesOutstanding",
+            ),
+            NUMERIC_DTYPE,
+        ),
+    },
+    "CASH_FLOW": {
+        **_REPORT_KEYS,
+        **dict.fromkeys(
+            (
+                "operatingCashflow",
+                "paymentsForOperatingActivities",
+                "proceedsFromOperatingActivities",
+                "changeInOperatingLiabilities",
+                "changeInOperatingAssets",
+                "depreciationDepletionAndAmortization",
+                "capitalExpenditures",
+                "changeInReceivables",
+                "changeInInventory",
+                "profitLoss",
+                "cashflowFromInvestment",
+                "cashflowFromFinancing",
+                "proceedsFromRepaymentsOfShortTermDebt",
+                "paymentsForRepurchaseOfCommonStock",
+                "paymentsForRepurchaseOfEquity",
+                "paymentsForRepurchaseOfPreferredStock",
+                "dividendPayout",
+                "dividendPayoutCommonStock",
+                "dividendPayoutPreferredStock",
+                "proceedsFromIssuanceOfCommonStock",
+                "proceedsFromIssuanceOfLongTermDebtAndCapitalSecuritiesNet",
+                "proceedsFromIssuanceOfPreferredStock",
+                "proceedsFromRepurchaseOfEquity",
+                "proceedsFromSaleOfTreasuryStock",
+                "changeInCashAndCashEquivalents",
+                "changeInExchangeRate",
+                "netIncome",
+            ),
+            NUMERIC_DTYPE,
+        ),
+    },
+}
 
 
 # Funciones Auxiliares
-def closest_price_from_df(
-    prices_df: pd.DataFrame, fecha_objetivo: pd.Timestamp
-) -> Union[pd.Series | pd.DataFrame]:
-    """
-    Funcion auxiliar para obtener la fila del dataframe de precios con la fecha mas cercana
-    al dia indicado. Devuelve la linea de __prices_df con el precio mas cercano a la fecha
-    objetivo en caso de haberlo encontrado, si no, devuelve una np.Series vacia.
-    """
-    # Calcular la diferencia absoluta entre la fecha objetivo y todas las fechas en el indice
-    diferencias = abs(prices_df.index - fecha_objetivo)
-    # Encuentra la fecha con la diferencia minima, menor a 40 dias
-    fecha_mas_cercana = prices_df.index[diferencias.argmin()]
-
-    if abs(fecha_objetivo - fecha_mas_cercana) > pd.Timedelta(days=40):
-        return pd.Series()  # Devolvemos None
-    return prices_df.loc[fecha_mas_cercana]
-
-
-def replace_values_in_nested_dict(d: dict, old_values: list, new_value: str) -> dict:
-    """
-    Metodo auxiliar recursivo para quitar valores no deseados en un diccionario.
-    :d: Diccionario a tratar.
-    :old_values: lista de valores a cambiar.
-    :new_value: valor de cambio.
-    """
-    for k, v in d.items():
-        if isinstance(v, dict):
-            d[k] = replace_values_in_nested_dict(v, old_values, new_value)
-        elif str(v) in old_values:
-            d[k] = new_value
-    return d
-
-
-def ratio_calculation(operation: callable, default: any = None) -> any:
-    """
-    Metodo auxiliar que permite el control de las operaciones de ratios
-    """
-    try:
-        return operation()
-    except ZeroDivisionError:
-        return default
-
-
-def geometric_mean_growth_rate(data: pd.DataFrame, column: str, y_periods: int = 5):
-    """
-    Metodo auxiliar para el calculo del crecimiento de la media geometrica, lo que nos permite
-    saber si un atributo a crecido o decrecido en el periodo establecido
-    """
-    filtered_data = pd.to_numeric(data[column].tail(3 * y_periods + 1), errors="ignore")
-    if len(filtered_data) < 2:
-        return 0
-    # Calculo de los crecimientos año a año
-    growth_factors = []
-    mean_growth_factors = 0
-    for i in range(1, len(filtered_data)):
-        try:
-            growth = (
-                filtered_data.iloc[i] - filtered_data.iloc[i - 1]
-            ) / filtered_data.iloc[i]
-        except TypeError:
-            growth = 0
-        growth_factors.append(growth)
-        mean_growth_factors += abs(growth)
-    mean_growth_factors /= len(growth_factors)
-
-    # Calculo de GMGR
-    geometric_factors = []
-    recorded_periods, skipped_periods = 0, 0
-    for g in growth_factors:
-        # Excluir crecimientos negativos (resultarían en factores geométricos negativos
-        # y numeros complejos) y outliers que sobrepasen excesivamente la media
-        # de growth factors
-        if g > -1 and abs(g) < abs(mean_growth_factors * 5):
-            geometric_factors.append(1 + g)
-            recorded_periods += 1
+def parse_statement(reports: list, schema: dict) -> pd.DataFrame:
+    """
+    Funcion auxiliar para convertir la lista de informes de AlphaVantage en un dataframe
+    tipado segun el esquema, construyendo directamente cada columna con su dtype. Los
+    valores que faltan o no son numericos ("None") quedan como NaN.
+    """
+    columns = {}
+    for column, dtype in schema.items():
+        values = [report.get(column) for report in reports]
+        if dtype == "datetime64[ns]":
+            columns[column] = pd.to_datetime(values)
+        elif dtype == "category":
+            columns[column] = pd.Categorical(values)
         else:
-            skipped_periods += 1
+            columns[column] = pd.to_numeric(values, errors="coerce").astype(
+                dtype, copy=False
+            )
+    return pd.DataFrame(columns)
 
-    # Evitar división por cero si la lista está vacía
-    if not geometric_factors:
-        return 0
-    # En caso de no haber el doble de ciclos "positivos" que "negativos" devolvemos 0
-    if skipped_periods > 0 and recorded_periods / skipped_periods < 3:
-        return 0
 
-    gmgr = np.prod(geometric_factors) ** (1 / len(geometric_factors)) - 1
-    return gmgr * 100
+def join_statements(reports: dict, schemas: dict = None) -> pd.DataFrame:
+    """
+    Funcion auxiliar para unir en un solo paso los estados financieros trimestrales sobre
+    un indice comun de fiscalDateEnding. Regla de precedencia: cada columna se toma del
+    primer estado (en el orden de reports) que la contiene, por lo que las repetidas no
+    llegan a leerse del resto. Se conservan las fechas del primer estado, ordenadas.
+    :reports: diccionario estado -> lista de informes trimestrales de AlphaVantage
+    :schemas: diccionario estado -> esquema de tipos (por defecto STATEMENT_SCHEMAS)
+    """
+    schemas = STATEMENT_SCHEMAS if schemas is None else schemas
+    frames = []
+    taken_columns = set()
+    for statement, statement_reports in reports.items():
+        schema = {
+            column: dtype
+            for column, dtype in schemas[statement].items()
+            if column == "fiscalDateEnding" or column not in taken_columns
+        }
+        taken_columns.update(schema)
+        frame = parse_statement(statement_reports, schema).set_index("fiscalDateEnding")
+        frames.append(frame[~frame.index.duplicated()])
+    joined = pd.concat(frames, axis=1, join="outer").reindex(frames[0].index)
+    return joined.sort_index().reset_index()
 
 
-def score_for_ratio(attribute_value: float, threshold: float):
+def closest_prices_from_df(
+    prices: pd.Series,
+    fechas_objetivo: pd.Series | pd.DatetimeIndex,
+    tolerancia: pd.Timedelta = pd.Timedelta(days=40),
+) -> np.ndarray:
+    """
+    Funcion auxiliar para obtener, de una sola vez, el precio con la fecha mas cercana a cada
+    una de las fechas objetivo. Devuelve un array alineado con fechas_objetivo con el precio
+    encontrado, o NaN si la fecha mas cercana se aleja mas de la tolerancia (40 dias).
+    :prices: serie de precios indexada por fecha
+    :fechas_objetivo: fechas para las que se busca el precio
+    """
+    objetivos = pd.DataFrame(
+        {
+            "fecha": pd.to_datetime(np.asarray(fechas_objetivo)),
+            "posicion": np.arange(len(fechas_objetivo)),
+        }
+    ).sort_values("fecha")
+    precios = pd.DataFrame(
+        {
+            "fecha": pd.to_datetime(prices.index),
+            "precio": pd.to_numeric(prices, errors="coerce").to_numpy(dtype=float),
+        }
+    ).sort_values("fecha")
+    # Union por la fecha mas cercana (anterior o posterior) dentro de la tolerancia
+    union = pd.merge_asof(
+        objetivos, precios, on="fecha", direction="nearest", tolerance=tolerancia
+    )
+    resultado = np.full(len(fechas_objetivo), np.nan)
+    resultado[union["posicion"].to_numpy()] = union["precio"].to_numpy()
+    return resultado
+
+
+@model_seconds.time(operation="predict")
+def predict_rows(estimator: any, X: pd.DataFrame, compiled: bool = False) -> list:
+    # pylint: disable=C0103
+    """
+    Funcion auxiliar que devuelve la lista de predicciones del estimador entrenado para X.
+    Con compiled, se usa la inferencia compilada del ensemble (mismos resultados).
     """
-    Metodo para asignar una calificacion a un ratio
+    if compiled:
+        predictions = CompiledEnsemble.from_pipeline(estimator).predict(X)
+    else:
+        predictions = estimator.predict(X)
+    return [float(pred) for pred in predictions]
+
+
+def fit_and_predict(
+    estimator: any,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_next: pd.DataFrame,
+    compiled: bool = False,
+) -> list:
+    # pylint: disable=C0103
+    """
+    Funcion auxiliar para un paso del walk-forward: entrena el estimador con los datos de
+    entrenamiento y devuelve la lista de predicciones para X_next. Al ser una funcion de
+    modulo, puede ejecutarse en los procesos de un pool.
+    """
+    with model_seconds.time(operation="fit"):
+        estimator.fit(X_train, y_train)
+    return predict_rows(estimator, X_next, compiled)
+
+
+def row_hashes(data: pd.DataFrame) -> np.ndarray:
+    """
+    Funcion auxiliar que devuelve un hash (uint64) del contenido de cada fila del dataframe.
+    """
+    return pd.util.hash_pandas_object(data, index=False).to_numpy()
+
+
+def rows_fingerprint(hashes: np.ndarray, rows: any) -> str:
     """
-    # En caso de estar por encima del threshold: maxima nota
-    if attribute_value >= threshold:
-        return 100
-    # En caso de ser negativo: factor de amplificacion, aplicando como limite -100
-    if attribute_value < -3:
-        return max(10 * attribute_value / threshold, -100)
-    # else
-    return max(100 * (attribute_value / threshold), -100)
+    Funcion auxiliar que resume en una huella (sha256) el contenido de un conjunto de filas,
+    a partir de los hashes por fila de row_hashes.
+    """
+    return hashlib.sha256(np.ascontiguousarray(hashes[rows]).tobytes()).hexdigest()
+
+
+# Tabla declarativa de ratios: cada operacion recibe las columnas como arrays de numpy.
+# El orden importa, ya que un ratio puede emplear otro calculado antes (P/E usa EPS).
+RATIO_DEFINITIONS: dict = {
+    "EPS": lambda c: c["netIncome"] / c["commonStock"],
+    "P/E": lambda c: c["sharePrice"] / c["EPS"],
+    "ROE": lambda c: c["netIncome"] / c["totalShareholderEquity"],
+    "ROA": lambda c: c["netIncome"] / c["totalAssets"],
+    "bookValue": lambda c: (c["totalAssets"] - c["totalLiabilities"])
+    / c["commonStockSharesOutstanding"],
+    "currentRatio": lambda c: c["totalCurrentAssets"] / c["totalCurrentLiabilities"],
+    "debtEquityRatio": lambda c: c["totalLiabilities"] / c["totalShareholderEquity"],
+    "freeCashFlow": lambda c: c["operatingCashflow"] - c["capitalExpenditures"],
+}
+
+
+class _NumericColumns(dict):
+    """
+    Diccionario auxiliar que convierte bajo demanda (y una sola vez) las columnas del
+    dataframe a arrays float64, dejando como NaN los valores no numericos.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        super().__init__()
+        self.data = data
+
+    def __missing__(self, column: str) -> np.ndarray:
+        values = pd.to_numeric(self.data[column], errors="coerce").to_numpy(
+            dtype=np.float64
+        )
+        self[column] = values
+        return values
+
+
+def compute_ratios(data: pd.DataFrame, definitions: dict = None) -> pd.DataFrame:
+    """
+    Metodo auxiliar para el calculo vectorizado de los ratios financieros. Cada ratio se
+    calcula sobre columnas completas, por lo que sirve igual para uno o varios tickers.
+    Las divisiones por cero (inf) e indeterminaciones se convierten en NaN al calcular
+    cada ratio, de modo que los ratios que dependen de otros (P/E de EPS) tambien son NaN.
+    Devuelve un dataframe con una columna por ratio y el mismo indice que data.
+    """
+    definitions = RATIO_DEFINITIONS if definitions is None else definitions
+    columns = _NumericColumns(data)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for ratio, operation in definitions.items():
+            values = np.asarray(operation(columns), dtype=np.float64)
+            columns[ratio] = np.where(np.isfinite(values), values, np.nan)
+    return pd.DataFrame(
+        {ratio: columns[ratio] for ratio in definitions}, index=data.index
+    )
+
+
+def geometric_mean_growth_rates(
+    values: np.ndarray, lengths: np.ndarray = None, numeric: np.ndarray = None
+) -> np.ndarray:
+    """
+    Metodo auxiliar para el calculo vectorizado del crecimiento de la media geometrica
+    (GMGR, en %) de varias series a la vez, por ejemplo varios atributos de una empresa o
+    el mismo atributo de varias empresas.
+    :values: matriz (periodos, series), con el periodo mas reciente en la ultima fila
+    :lengths: numero de periodos validos de cada serie, contados desde la ultima fila (las
+    filas anteriores son relleno). Por defecto todas las filas son validas
+    :numeric: mascara de las celdas numericas; los crecimientos en los que interviene una
+    celda no numerica se toman como 0. Por defecto todas lo son
+    """
+    values = np.asarray(values, dtype=NUMERIC_DTYPE)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    n_periods, n_series = values.shape
+    if lengths is None:
+        lengths = np.full(n_series, n_periods)
+    n_growths = np.maximum(np.asarray(lengths) - 1, 0)
+
+    # Crecimientos periodo a periodo; la fila k compara los periodos k y k+1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (values[1:] - values[:-1]) / values[1:]
+    if numeric is not None:
+        numeric = np.asarray(numeric, dtype=bool).reshape(values.shape)
+        growth[~(numeric[1:] & numeric[:-1])] = 0
+    valid = np.arange(n_periods - 1)[:, np.newaxis] >= n_periods - 1 - n_growths
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_growth = np.where(valid, np.abs(growth), 0).sum(axis=0) / n_growths
+
+    # Excluir crecimientos negativos (resultarían en factores geométricos negativos
+    # y numeros complejos) y outliers que sobrepasen excesivamente la media
+    # de growth factors
+    with np.errstate(invalid="ignore"):
+        recorded = valid & (growth > -1) & (np.abs(growth) < np.abs(mean_growth * 5))
+    recorded_periods = recorded.sum(axis=0)
+    skipped_periods = n_growths - recorded_periods
+
+    # Media geometrica mediante la suma de logaritmos (sin desbordamientos del producto)
+    log_factors = np.log1p(np.where(recorded, growth, 0)).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gmgr = np.expm1(log_factors / recorded_periods) * 100
+    # Sin crecimientos validos, o sin el triple de ciclos "positivos" que "negativos": 0
+    valid_series = (recorded_periods > 0) & ~(
+        (skipped_periods > 0) & (recorded_periods < 3 * skipped_periods)
+    )
+    return np.where(valid_series, gmgr, 0.0)
@@ -0,0 +1,155 @@
+"""
+Modulo encargado de la gestion de la cache persistente en disco del backend.
+"""
+
+from contextlib import suppress
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+# Fraccion de max_bytes que se deja ocupada al expulsar, para que las siguientes
+# escrituras no vuelvan a recorrer el directorio enseguida
+EVICTION_TARGET = 0.9
+
+
+@dataclass
+class DiskCache:
+    """
+    Cache clave-valor persistente en disco, compartible entre varios procesos (workers).
+    Cada entrada se guarda en un fichero json propio, cuyo nombre es el hash de la clave.
+    El tamaño ocupado se estima con las escrituras del proceso, y el directorio solo se
+    recorre al superar max_bytes o cada scan_every escrituras (para contar tambien las de
+    otros procesos), por lo que el coste de la expulsion se reparte entre las escrituras.
+    :directory: carpeta donde se almacenan las entradas
+    :max_bytes: tamaño maximo que puede ocupar la cache antes de expulsar entradas (LRU)
+    :scan_every: escrituras entre dos recorridos completos del directorio
+    """
+
+    directory: str
+    max_bytes: int = 256 * 1024 * 1024
+    scan_every: int = 1000
+    _size: int = field(default=None, repr=False)
+    _writes: int = field(default=0, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key: tuple, ttl: float, touch: bool = True) -> any:
+        """
+        Devuelve el valor asociado a la clave si existe y no ha superado su TTL (segundos),
+        en caso contrario devuelve None.
+        :touch: si es False la consulta no cuenta como uso de la entrada para la expulsion
+        """
+        path = self.__path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() - entry["created"] > ttl:
+            return None
+        # Actualizamos la fecha de modificacion para que la expulsion sea LRU
+        if touch:
+            with suppress(FileNotFoundError):
+                os.utime(path)
+        return entry["value"]
+
+    def set(self, key: tuple, value: any):
+        """
+        Guarda el valor (serializable a json) asociado a la clave. La escritura es atomica:
+        se escribe un fichero temporal y se renombra, por lo que otro proceso nunca lee
+        una entrada a medio escribir.
+        """
+        path = self.__path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump({"created": time.time(), "value": value}, file)
+            added = os.path.getsize(tmp_path) - self.__size_of(path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._writes += 1
+            if self._size is not None:
+                self._size += added
+            if (
+                self._size is None
+                or self._size > self.max_bytes
+                or not self._writes % self.scan_every
+            ):
+                self.__evict()
+
+    def delete(self, key: tuple):
+        """
+        Elimina la entrada asociada a la clave, en caso de existir.
+        """
+        path = self.__path(key)
+        removed = self.__size_of(path)
+        with suppress(FileNotFoundError):
+            os.remove(path)
+            with self._lock:
+                if self._size is not None:
+                    self._size -= removed
+
+    def clear(self):
+        """
+        Elimina todas las entradas de la cache.
+        """
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                with suppress(FileNotFoundError):
+                    os.remove(entry.path)
+        with self._lock:
+            self._size = 0
+
+    # Metodos auxiliares
+
+    def __path(self, key: tuple) -> str:
+        """
+        Ruta del fichero de la entrada asociada a la clave.
+        """
+        digest = hashlib.sha256("|".join(map(str, key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    @staticmethod
+    def __size_of(path: str) -> int:
+        """
+        Tamaño del fichero de una entrada, o 0 si no existe.
+        """
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+    def __evict(self):
+        """
+        Recorre el directorio para actualizar el tamaño ocupado y, si supera max_bytes,
+        expulsa las entradas usadas hace mas tiempo hasta dejarlo por debajo de
+        EVICTION_TARGET * max_bytes. Se llama con el cerrojo adquirido.
+        """
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            # Las entradas borradas por otro proceso mientras se recorre se ignoran
+            with suppress(FileNotFoundError):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+        if total_bytes > self.max_bytes:
+            for _, size, path in sorted(entries):
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+                total_bytes -= size
+                if total_bytes <= EVICTION_TARGET * self.max_bytes:
+                    break
+        self._size = total_bytes
@@ -0,0 +1,59 @@
+"""
+Modulo encargado de comprimir las respuestas del backend segun la codificacion que acepte
+el cliente (cabecera Accept-Encoding).
+"""
+
+# pylint: disable=E0401
+import gzip
+
+try:
+    import brotli
+except ImportError:  # sin brotli solo se ofrece gzip
+    brotli = None
+
+
+# Tipos de respuesta que se comprimen y tamaño minimo para que compense hacerlo
+COMPRESSIBLE_MIMETYPES: tuple = ("application/json",)
+MIN_COMPRESS_BYTES: int = 1024
+# Codificaciones disponibles, por orden de preferencia, y su funcion de compresion
+ENCODERS: dict = {
+    **({"br": lambda body: brotli.compress(body, quality=5)} if brotli else {}),
+    "gzip": lambda body: gzip.compress(body, compresslevel=5),
+}
+
+
+def negotiate_encoding(accept_encodings: any) -> str:
+    """
+    Devuelve la codificacion preferida de entre las aceptadas por el cliente (objeto
+    Accept de werkzeug, request.accept_encodings), o None si no acepta ninguna.
+    """
+    accepted = [
+        (accept_encodings.quality(encoding), -position, encoding)
+        for position, encoding in enumerate(ENCODERS)
+        if accept_encodings.quality(encoding) > 0
+    ]
+    return max(accepted)[2] if accepted else None
+
+
+def compress_response(response: any, accept_encodings: any) -> any:
+    """
+    Comprime el cuerpo de la respuesta (objeto Response de flask) con la codificacion
+    negociada. Solo se comprimen las respuestas completas (no en streaming) con estado
+    200, de un tipo comprimible y de al menos MIN_COMPRESS_BYTES.
+    """
+    if (
+        response.status_code != 200
+        or response.is_streamed
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding(accept_encodings)
+    body = response.get_data()
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return response
+    response.set_data(ENCODERS[encoding](body))
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,173 @@
+"""
+Modulo encargado de ejecutar los calculos largos en segundo plano, con un numero acotado
+de hilos, para que las peticiones HTTP no tengan que esperar a que terminen.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import suppress
+from dataclasses import dataclass, field
+import os
+import queue
+import threading
+import time
+import uuid
+
+
+# Hilos que ejecutan los trabajos y trabajos sin terminar que se admiten como maximo
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "100"))
+# Segundos que se conserva el resultado de un trabajo terminado
+JOB_TTL = int(os.getenv("JOB_TTL", "600"))
+# Estados de un trabajo
+PENDING, RUNNING, DONE, FAILED = "pendiente", "en_curso", "completado", "error"
+
+
+@dataclass
+class Job:
+    """
+    Trabajo enviado al gestor.
+    :id: identificador del trabajo
+    :key: clave del calculo (los trabajos con la misma clave sin terminar se comparten)
+    :status: estado del trabajo (PENDING, RUNNING, DONE o FAILED)
+    :submitted: fecha de envio (time.time())
+    :finished: fecha de finalizacion, o None si no ha terminado
+    :future: Future con el resultado del calculo
+    """
+
+    id: str
+    key: any
+    status: str = PENDING
+    submitted: float = field(default_factory=time.time)
+    finished: float = None
+    future: Future = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        """
+        Indica si el trabajo ha terminado (correctamente o con error).
+        """
+        return self.status in (DONE, FAILED)
+
+    def as_dict(self) -> dict:
+        """
+        Devuelve el estado del trabajo y, si ha terminado, su resultado ("respuesta") o el
+        mensaje de su error ("Error").
+        """
+        job = {"id": self.id, "estado": self.status}
+        if self.status == DONE:
+            job["respuesta"] = self.future.result()
+        elif self.status == FAILED:
+            job["Error"] = str(self.future.exception())
+        return job
+
+
+@dataclass
+class JobManager:
+    """
+    Gestor de trabajos en segundo plano: cada trabajo se ejecuta en un pool de
+    max_workers hilos y su resultado se consulta mas tarde por su identificador.
+    :max_workers: numero de trabajos que se ejecutan a la vez
+    :max_pending: numero maximo de trabajos sin terminar (en cola o en curso)
+    :ttl: segundos que se conservan los trabajos terminados
+    """
+
+    max_workers: int = JOB_WORKERS
+    max_pending: int = JOB_MAX_PENDING
+    ttl: float = JOB_TTL
+    _executor: ThreadPoolExecutor = field(default=None, repr=False)
+    _jobs: dict = field(default_factory=dict, repr=False)
+    _active: dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="job"
+        )
+
+    def submit(self, key: any, function: callable, *args, **kwargs) -> Job:
+        """
+        Envia function(*args, **kwargs) al pool y devuelve el trabajo sin esperar a que
+        termine. Si ya hay un trabajo sin terminar con la misma clave se devuelve ese.
+        Lanza queue.Full si se ha alcanzado el maximo de trabajos sin terminar.
+        """
+        with self._lock:
+            self.__purge()
+            job = self._active.get(key)
+            if job is not None:
+                return job
+            if len(self._active) >= self.max_pending:
+                raise queue.Full(
+                    f"Hay {len(self._active)} trabajos pendientes, intentelo mas tarde"
+                )
+            job = Job(id=uuid.uuid4().hex, key=key)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            job.future = self._executor.submit(self.__run, job, function, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """
+        Devuelve el trabajo con el identificador job_id, o None si no existe o ha caducado.
+        """
+        with self._lock:
+            self.__purge()
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float = 0) -> Job:
+        """
+        Devuelve el trabajo con el identificador job_id (o None) tras esperar como mucho
+        timeout segundos a que termine (long polling).
+        """
+        job = self.get(job_id)
+        if job is not None and timeout > 0:
+            with suppress(FutureTimeoutError):
+                job.future.exception(timeout=timeout)
+        return job
+
+    def pending(self) -> int:
+        """
+        Devuelve el numero de trabajos sin terminar.
+        """
+        with self._lock:
+            return len(self._active)
+
+    def shutdown(self, wait: bool = True):
+        """
+        Detiene el pool de hilos (los trabajos en cola se cancelan).
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # Metodos auxiliares
+
+    def __run(self, job: Job, function: callable, args: tuple, kwargs: dict) -> any:
+        """
+        Ejecuta el calculo de un trabajo actualizando su estado.
+        """
+        job.status = RUNNING
+        try:
+            result = function(*args, **kwargs)
+        except Exception:
+            job.status = FAILED
+            raise
+        else:
+            job.status = DONE
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._active.pop(job.key, None)
+        return result
+
+    def __purge(self):
+        """
+        Elimina los trabajos terminados hace mas de ttl segundos. Se llama con el cerrojo
+        adquirido.
+        """
+        limit = time.time() - self.ttl
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished is not None and job.finished < limit
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,60 @@
+"""
+Modulo encargado de la configuracion de los logs del backend: una linea JSON por mensaje,
+con los campos pasados en extra (ticker, funcion de AlphaVantage, etc.) como claves.
+"""
+
+import json
+import logging
+import os
+import sys
+
+
+# Nivel de los logs y formato ("json" o "text")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Atributos propios de LogRecord, que no se escriben como campos del mensaje
+RECORD_ATTRIBUTES: frozenset = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None))
+) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formateador que escribe cada mensaje como un objeto JSON en una linea: fecha, nivel,
+    logger, mensaje, campos de extra y, si la hay, la traza de la excepcion.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **{
+                key: value
+                for key, value in vars(record).items()
+                if key not in RECORD_ATTRIBUTES
+            },
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(level: str = LOG_LEVEL, log_format: str = LOG_FORMAT):
+    """
+    Configura el logger raiz para escribir en stderr con el formato indicado. Si ya se
+    habia configurado, se sustituye su handler.
+    """
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(
+        JsonFormatter()
+        if log_format == "json"
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    handler.set_name("backend")
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if h.get_name() == "backend"]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
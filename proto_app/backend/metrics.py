@@ -0,0 +1,231 @@
+"""
+Modulo encargado de las metricas del backend (contadores e histogramas con etiquetas) y de
+su exposicion en el formato de texto de Prometheus. Las metricas son propias de cada
+proceso: con varios workers, Prometheus debe consultar cada uno de ellos.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import threading
+import time
+
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Limites (segundos) de los intervalos de los histogramas: desde una consulta a la cache
+# hasta un walk-forward completo con esperas del limite de la API
+DEFAULT_BUCKETS: tuple = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120
+)  # fmt: skip
+
+
+def format_labels(labels: tuple, extra: str = "") -> str:
+    """
+    Funcion auxiliar que escribe las etiquetas (tuplas nombre, valor) de una muestra,
+    escapando las barras, comillas y saltos de linea de los valores.
+    """
+    escapes = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+    pairs = [f'{name}="{str(value).translate(escapes)}"' for name, value in labels]
+    pairs += [extra] if extra else []
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    """
+    Funcion auxiliar que escribe el valor de una muestra (enteros sin decimales).
+    """
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+@dataclass
+class Counter:
+    """
+    Contador monotono, con un valor por cada combinacion de etiquetas.
+    :name: nombre de la metrica
+    :documentation: descripcion de la metrica (linea HELP)
+    """
+
+    name: str
+    documentation: str
+    _values: dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def inc(self, amount: float = 1.0, **labels):
+        """
+        Incrementa el contador de las etiquetas en amount.
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """
+        Devuelve el valor del contador de las etiquetas.
+        """
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def render(self) -> list:
+        """
+        Devuelve las lineas de la metrica en el formato de Prometheus.
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines += [
+            f"{self.name}{format_labels(key)} {format_value(value)}"
+            for key, value in values
+        ]
+        return lines
+
+
+@dataclass
+class Histogram:
+    """
+    Histograma de duraciones (u otros valores), con una distribucion por cada combinacion
+    de etiquetas.
+    :name: nombre de la metrica
+    :documentation: descripcion de la metrica (linea HELP)
+    :buckets: limites superiores de los intervalos, en orden creciente
+    """
+
+    name: str
+    documentation: str
+    buckets: tuple = DEFAULT_BUCKETS
+    _counts: dict = field(default_factory=dict, repr=False)
+    _sums: dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def observe(self, value: float, **labels):
+        """
+        Añade una observacion a la distribucion de las etiquetas.
+        """
+        key = tuple(sorted(labels.items()))
+        position = next(
+            (i for i, bound in enumerate(self.buckets) if value <= bound),
+            len(self.buckets),
+        )
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[position] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Gestor de contexto (o decorador) que observa la duracion del bloque en segundos,
+        tambien si termina con una excepcion.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        """
+        Devuelve el numero de observaciones de las etiquetas.
+        """
+        with self._lock:
+            return sum(self._counts.get(tuple(sorted(labels.items())), []))
+
+    def render(self) -> list:
+        """
+        Devuelve las lineas de la metrica en el formato de Prometheus (intervalos
+        acumulados, suma y numero de observaciones).
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            distributions = [
+                (key, list(counts), self._sums[key])
+                for key, counts in sorted(self._counts.items())
+            ]
+        for key, counts, total in distributions:
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += count
+                bucket_label = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{format_labels(key, bucket_label)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{format_labels(key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(key)} {cumulative}")
+        return lines
+
+
+@dataclass
+class Registry:
+    """
+    Conjunto de metricas del proceso, que se exponen juntas.
+    """
+
+    _metrics: dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        """
+        Devuelve el contador con el nombre dado, creandolo si no existe.
+        """
+        return self.__register(Counter(name, documentation))
+
+    def histogram(
+        self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """
+        Devuelve el histograma con el nombre dado, creandolo si no existe.
+        """
+        return self.__register(Histogram(name, documentation, buckets))
+
+    def render(self) -> str:
+        """
+        Devuelve todas las metricas en el formato de texto de Prometheus.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+    # Metodos auxiliares
+
+    def __register(self, metric: any) -> any:
+        """
+        Registra la metrica, o devuelve la ya registrada con el mismo nombre.
+        """
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+
+# Metricas del backend
+registry = Registry()
+stage_seconds = registry.histogram(
+    "datamanager_stage_seconds",
+    "Duracion de cada etapa de DataManager y de la serializacion de la respuesta",
+)
+alphavantage_request_seconds = registry.histogram(
+    "alphavantage_request_seconds",
+    "Duracion de cada llamada HTTP a AlphaVantage",
+)
+model_seconds = registry.histogram(
+    "model_operation_seconds", "Duracion de cada fit y predict del modelo"
+)
+http_request_seconds = registry.histogram(
+    "http_request_seconds", "Duracion de cada peticion al backend"
+)
+rate_limit_waits = registry.counter(
+    "rate_limit_waits_total",
+    "Llamadas a AlphaVantage que han esperado a tener un token del limitador",
+)
+rate_limit_wait_seconds = registry.counter(
+    "rate_limit_wait_seconds_total", "Segundos esperados por el limitador"
+)
+rate_limit_retries = registry.counter(
+    "alphavantage_rate_limit_retries_total",
+    "Reintentos por avisos de limite de AlphaVantage",
+)
+cache_requests = registry.counter(
+    "cache_requests_total", "Consultas a cada cache del backend (hit o miss)"
+)
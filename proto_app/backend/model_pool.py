@@ -0,0 +1,125 @@
+"""
+Modulo encargado de cargar el modelo bajo demanda y de repartir copias independientes
+del mismo entre las peticiones.
+"""
+
+# pylint: disable=C0415,R0902
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import hashlib
+import queue
+import threading
+from joblib import load
+
+
+@dataclass
+class ModelPool:
+    """
+    Pool de copias del modelo guardado en path. El modelo no se carga al crear el pool sino
+    en su primer uso, y se carga con mmap_mode para que los arrays de numpy se lean del
+    fichero mapeado (paginas compartidas entre los workers de un mismo servidor).
+    Cada peticion obtiene su propia copia (clone: mismos hiperparametros, sin entrenar) y
+    la devuelve al terminar para que otra la reutilice, de forma que las peticiones
+    concurrentes nunca entrenan el mismo objeto.
+    :path: fichero joblib con el modelo (prototipo del que se obtienen las copias)
+    :max_idle: numero maximo de copias libres que se conservan para reutilizar
+    :mmap_mode: modo de mapeo en memoria de joblib.load (None para leerlo completo)
+    """
+
+    path: str
+    max_idle: int = 8
+    mmap_mode: str = "r"
+    _idle: queue.LifoQueue = field(default_factory=queue.LifoQueue, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _prototype: any = field(default=None, repr=False)
+    _version: str = field(default="", repr=False)
+    _generation: int = field(default=0, repr=False)
+
+    @property
+    def prototype(self) -> any:
+        """
+        Modelo cargado del que se obtienen las copias (no se entrena nunca). Se carga del
+        fichero la primera vez que se consulta.
+        """
+        if self._prototype is None:
+            with self._lock:
+                if self._prototype is None:
+                    self.__load(self.path)
+        return self._prototype
+
+    @property
+    def version(self) -> str:
+        """
+        Identificador de la version del modelo (hash del fichero). Se calcula sin necesidad
+        de cargar el modelo.
+        """
+        if not self._version:
+            with self._lock:
+                if not self._version:
+                    self._version = self.__file_hash(self.path)
+        return self._version
+
+    def reload(self, path: str = None):
+        """
+        Carga de nuevo el modelo (del mismo fichero o de path) sin reiniciar el proceso.
+        Las copias libres del modelo anterior se descartan, y las que esten en uso no se
+        reutilizan al devolverse.
+        """
+        with self._lock:
+            self.__load(path or self.path)
+            self._idle = queue.LifoQueue()
+            self._generation += 1
+
+    def acquire(self) -> any:
+        """
+        Devuelve una copia libre del modelo, creandola si no hay ninguna disponible.
+        """
+        from sklearn.base import clone
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return clone(self.prototype)
+
+    def release(self, estimator: any, generation: int = None):
+        """
+        Devuelve una copia al pool para su reutilizacion, salvo que se obtuviera de un
+        modelo anterior a la ultima recarga.
+        """
+        if generation not in (None, self._generation):
+            return
+        if self._idle.qsize() < self.max_idle:
+            self._idle.put_nowait(estimator)
+
+    @contextmanager
+    def model(self):
+        """
+        Gestor de contexto que presta una copia del modelo durante el bloque with.
+        """
+        generation = self._generation
+        estimator = self.acquire()
+        try:
+            yield estimator
+        finally:
+            self.release(estimator, generation)
+
+    # Metodos auxiliares
+
+    def __load(self, path: str):
+        """
+        Carga el modelo de path y su version. Se llama con el cerrojo adquirido.
+        """
+        self._prototype = load(path, mmap_mode=self.mmap_mode)
+        self._version = self.__file_hash(path)
+        self.path = path
+
+    @staticmethod
+    def __file_hash(path: str) -> str:
+        """
+        Hash sha256 del contenido del fichero.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
@@ -0,0 +1,163 @@
+"""
+Modulo encargado de precalcular en segundo plano las respuestas de los tickers mas
+consultados, usando solo los tokens del limitador de la API que no necesitan las
+peticiones de los usuarios.
+"""
+
+# pylint: disable=E0401
+from dataclasses import dataclass, field
+from itertools import islice
+import logging
+import os
+import threading
+import time
+from metrics import registry
+from rate_limiter import TokenBucket
+
+
+# Precalculo activado y tickers mas consultados que se mantienen precalculados
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_TICKERS = int(os.getenv("PREFETCH_TICKERS", "300"))
+# Segundos entre rondas de precalculo y tickers que se precalculan como maximo por ronda
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "60"))
+PREFETCH_TICKERS_PER_ROUND = int(os.getenv("PREFETCH_TICKERS_PER_ROUND", "10"))
+# Tokens del limitador que el precalculo deja siempre libres para los usuarios
+PREFETCH_RESERVED_TOKENS = float(os.getenv("PREFETCH_RESERVED_TOKENS", "2"))
+# Semivida (segundos) de las consultas: una consulta de hace un dia pesa la mitad
+PREFETCH_HALF_LIFE = float(os.getenv("PREFETCH_HALF_LIFE", str(24 * 3600)))
+
+logger = logging.getLogger(__name__)
+prefetch_results = registry.counter(
+    "prefetch_tickers_total", "Tickers revisados por el precalculo, por resultado"
+)
+
+
+@dataclass
+class PrefetchScheduler:
+    # pylint: disable=R0902
+    """
+    Planificador que cuenta las consultas de cada ticker (con decaimiento exponencial) y,
+    cada interval segundos, precalcula las respuestas de los mas consultados mientras el
+    limitador tenga tokens por encima de la reserva.
+    :refresh: funcion que recibe un ticker y precalcula su respuesta si no esta al dia.
+    Devuelve True si la ha calculado y False si ya estaba al dia o en curso; lanza una
+    excepcion si no ha podido calcularla (por ejemplo, por falta de tokens libres)
+    :bucket: limitador de la API compartido con las peticiones de los usuarios
+    :max_tickers: numero de tickers mas consultados que se mantienen precalculados
+    :per_round: tickers que se precalculan como maximo en cada ronda
+    :reserve: tokens del limitador que se dejan siempre libres
+    :interval: segundos entre rondas
+    :half_life: semivida (segundos) del peso de cada consulta
+    """
+
+    refresh: callable
+    bucket: TokenBucket
+    max_tickers: int = PREFETCH_TICKERS
+    per_round: int = PREFETCH_TICKERS_PER_ROUND
+    reserve: float = PREFETCH_RESERVED_TOKENS
+    interval: float = PREFETCH_INTERVAL
+    half_life: float = PREFETCH_HALF_LIFE
+    _scores: dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, repr=False)
+    _thread: threading.Thread = field(default=None, repr=False)
+
+    def record(self, ticker: str, now: float = None):
+        """
+        Registra una consulta del ticker.
+        """
+        now = time.time() if now is None else now
+        ticker = ticker.upper()
+        with self._lock:
+            self._scores[ticker] = (self.__score(ticker, now) + 1.0, now)
+            # Se conservan solo los tickers con opciones de estar entre los mas consultados
+            if len(self._scores) > 10 * self.max_tickers:
+                ranking = self.__ranking(now)
+                for ticker_out, _ in islice(ranking, self.max_tickers, None):
+                    del self._scores[ticker_out]
+
+    def hottest(self, now: float = None) -> list:
+        """
+        Devuelve los max_tickers tickers mas consultados, de mas a menos consultado.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            return [ticker for ticker, _ in self.__ranking(now)[: self.max_tickers]]
+
+    def run_once(self) -> list:
+        """
+        Ejecuta una ronda de precalculo: recorre los tickers mas consultados y precalcula
+        los que no estan al dia, hasta per_round tickers o hasta que el limitador no tenga
+        tokens por encima de la reserva. Devuelve los tickers precalculados.
+        """
+        refreshed = []
+        for ticker in self.hottest():
+            if len(refreshed) >= self.per_round or self.bucket.available() < (
+                self.reserve + 1
+            ):
+                break
+            try:
+                if self.refresh(ticker):
+                    refreshed.append(ticker)
+                    prefetch_results.inc(result="refreshed")
+                else:
+                    prefetch_results.inc(result="fresh")
+            except Exception as e:  # pylint: disable=W0718
+                # Se reintenta en la siguiente ronda
+                prefetch_results.inc(result="failed")
+                logger.warning(
+                    "Error en el precalculo", extra={"ticker": ticker, "error": str(e)}
+                )
+        return refreshed
+
+    def start(self):
+        """
+        Lanza las rondas de precalculo en un hilo en segundo plano, si no se han lanzado
+        ya (puede llamarse en cada peticion).
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self.__loop, name="prefetch", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self):
+        """
+        Detiene el hilo de precalculo al terminar la ronda en curso.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    # Metodos auxiliares
+
+    def __loop(self):
+        """
+        Ejecuta una ronda de precalculo cada interval segundos hasta que se detiene.
+        """
+        while not self._stop.wait(self.interval):
+            refreshed = self.run_once()
+            if refreshed:
+                logger.info("Tickers precalculados", extra={"tickers": refreshed})
+
+    def __score(self, ticker: str, now: float) -> float:
+        """
+        Peso de las consultas del ticker en now. Se llama con el cerrojo adquirido.
+        """
+        score, updated = self._scores.get(ticker, (0.0, now))
+        return score * 0.5 ** ((now - updated) / self.half_life)
+
+    def __ranking(self, now: float) -> list:
+        """
+        Tuplas (ticker, peso) ordenadas de mas a menos consultado. Se llama con el
+        cerrojo adquirido.
+        """
+        return sorted(
+            ((ticker, self.__score(ticker, now)) for ticker in self._scores),
+            key=lambda item: item[1],
+            reverse=True,
+        )
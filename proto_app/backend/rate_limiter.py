@@ -0,0 +1,200 @@
+"""
+Modulo encargado de limitar las llamadas a la API de AlphaVantage al ritmo permitido
+por el plan contratado, de forma compartida entre hilos y procesos.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from metrics import (  # pylint: disable=E0401
+    rate_limit_retries,
+    rate_limit_wait_seconds,
+    rate_limit_waits,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: el limite solo se comparte entre hilos del proceso
+    fcntl = None
+
+
+# Plan de la API: llamadas por minuto permitidas
+ALPHAVANTAGE_REQUESTS_PER_MINUTE = int(
+    os.getenv("ALPHAVANTAGE_REQUESTS_PER_MINUTE", "5")
+)
+RATE_LIMIT_STATE_PATH = os.getenv(
+    "RATE_LIMIT_STATE_PATH",
+    os.path.join(tempfile.gettempdir(), "alphavantage_rate_limit.json"),
+)
+# Tiempo maximo (segundos) que se espera a que la API acepte una llamada
+REQUEST_DEADLINE: int = 300
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenBucket:
+    """
+    Limitador de tipo token bucket. El estado (tokens disponibles y fecha de la ultima
+    recarga) se guarda en un fichero protegido con flock, de manera que todos los procesos
+    que usen el mismo fichero comparten el limite.
+    :state_path: fichero con el estado compartido del limitador
+    :rate: tokens que se recargan por segundo
+    :capacity: numero maximo de tokens acumulables (rafaga permitida)
+    """
+
+    state_path: str
+    rate: float
+    capacity: float
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def acquire(self, timeout: float = None) -> float:
+        """
+        Reserva un token, esperando solo el tiempo necesario hasta que este disponible.
+        Devuelve los segundos esperados. Si el token no puede obtenerse antes de timeout
+        segundos, no se reserva y se lanza TimeoutError.
+        """
+        wait = self.__reserve(timeout)
+        if wait > 0:
+            rate_limit_waits.inc()
+            rate_limit_wait_seconds.inc(wait)
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self, reserve: float = 0) -> bool:
+        """
+        Reserva un token solo si esta disponible sin esperar y, tras reservarlo, quedan al
+        menos reserve tokens libres para otras llamadas. No bloquea: devuelve si se ha
+        reservado el token.
+        """
+        with self._lock, self.__locked_state() as state:
+            now = time.time()
+            tokens = self.__refill(state, now)
+            if tokens - 1 < reserve:
+                return False
+            state["tokens"] = tokens - 1
+            state["updated"] = now
+        return True
+
+    def available(self) -> float:
+        """
+        Devuelve los tokens disponibles en este momento, sin reservar ninguno (negativo si
+        hay llamadas esperando su turno).
+        """
+        with self._lock, self.__locked_state() as state:
+            return self.__refill(state, time.time())
+
+    # Metodos auxiliares
+
+    def __refill(self, state: dict, now: float) -> float:
+        """
+        Devuelve los tokens del estado compartido recargados hasta now.
+        """
+        return min(
+            self.capacity,
+            state.get("tokens", self.capacity)
+            + (now - state.get("updated", now)) * self.rate,
+        )
+
+    def __reserve(self, timeout: float = None) -> float:
+        """
+        Descuenta un token del estado compartido y devuelve cuanto hay que esperar hasta
+        poder usarlo. Los tokens pueden quedar en negativo: cada llamada reserva su hueco
+        y las siguientes esperan a continuacion.
+        """
+        with self._lock, self.__locked_state() as state:
+            now = time.time()
+            tokens = self.__refill(state, now)
+            wait = max(0.0, (1 - tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                raise TimeoutError(
+                    f"No hay tokens disponibles en los proximos {timeout:.0f} segundos"
+                )
+            state["tokens"] = tokens - 1
+            state["updated"] = now
+        return wait
+
+    @contextmanager
+    def __locked_state(self):
+        """
+        Abre el fichero de estado con un cerrojo exclusivo y lo reescribe al salir.
+        """
+        with open(self.state_path, "a+", encoding="utf-8") as file:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                try:
+                    state = json.loads(file.read() or "{}")
+                except json.JSONDecodeError:
+                    state = {}
+                yield state
+                file.seek(0)
+                file.truncate()
+                json.dump(state, file)
+                file.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+
+# Limitador compartido por todas las llamadas a AlphaVantage
+alphavantage_bucket = TokenBucket(
+    state_path=RATE_LIMIT_STATE_PATH,
+    rate=ALPHAVANTAGE_REQUESTS_PER_MINUTE / 60,
+    capacity=ALPHAVANTAGE_REQUESTS_PER_MINUTE,
+)
+
+
+def is_rate_limited(response: dict) -> bool:
+    """
+    Funcion auxiliar que indica si la respuesta de AlphaVantage es un aviso de limite.
+    """
+    return "Note" in response or "rate limit" in str(response.get("Information", ""))
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    Funcion auxiliar para el calculo del tiempo de espera entre reintentos: backoff
+    exponencial con jitter completo.
+    """
+    return random.SystemRandom().uniform(0, min(cap, base * 2**attempt))
+
+
+def request_with_rate_limit(
+    request: callable,
+    bucket: TokenBucket = alphavantage_bucket,
+    deadline: float = REQUEST_DEADLINE,
+    reserve: float = None,
+) -> dict:
+    """
+    Ejecuta request (funcion que hace la llamada y devuelve el json) respetando el limite
+    de la API. Antes de cada intento se espera a tener un token y, si aun asi la API avisa
+    del limite, se reintenta con backoff. Lanza TimeoutError si se supera deadline segundos.
+    :reserve: si se indica (llamadas en segundo plano), no se espera al limitador: el
+    token solo se obtiene si quedan reserve tokens libres y, si no, se lanza TimeoutError
+    """
+    end = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        if reserve is None:
+            bucket.acquire(timeout=end - time.monotonic())
+        elif not bucket.try_acquire(reserve):
+            raise TimeoutError("No hay tokens libres para llamadas en segundo plano")
+        response = request()
+        if not is_rate_limited(response):
+            return response
+        delay = backoff_delay(attempt)
+        if time.monotonic() + delay > end:
+            raise TimeoutError("Limite de la API de AlphaVantage superado")
+        rate_limit_retries.inc()
+        logger.warning(
+            "AlphaVantage API limit, retrying", extra={"delay": round(delay, 1)}
+        )
+        time.sleep(delay)
+        attempt += 1
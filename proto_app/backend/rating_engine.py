@@ -0,0 +1,181 @@
+"""
+Modulo encargado del calculo vectorizado de la calificacion de un universo de empresas
+(una fila por ticker), con las mismas reglas que DataManager.calculate_rating.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import pandas as pd
+from data_manager_aux import geometric_mean_growth_rates  # pylint: disable=E0401
+
+
+# Atributos de cada componente de la calificacion
+RATING_CATEGORIES: dict = {
+    "growth": ("totalRevenue", "ebitda", "freeCashFlow", "dividendPayout"),
+    "profitability": ("netIncome", "ROE", "ROA", "bookValue"),
+    "financialHealth": ("currentRatio", "debtEquityRatio"),
+}
+# Ratios y valor a partir del cual se consideran un buen indicador (maxima nota)
+RATIO_THRESHOLDS: dict = {
+    "ROE": 0.15,
+    "ROA": 0.05,
+    "currentRatio": 1.0,
+    "debtEquityRatio": 1.0,
+    "bookValue": 1.0,
+}
+# Atributos que se puntuan con su GMGR (el resto son ratios)
+GROWTH_ATTRIBUTES: tuple = tuple(
+    attribute
+    for attributes in RATING_CATEGORIES.values()
+    for attribute in attributes
+    if attribute not in RATIO_THRESHOLDS
+)
+# Periodos de los que se calcula el GMGR (3 * y_periods + 1, con y_periods = 5)
+GMGR_PERIODS: int = 16
+
+
+def rate_universe(history: pd.DataFrame, latest: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula la calificacion de todas las empresas a la vez. Devuelve una tabla indexada por
+    ticker con la puntuacion de cada atributo, de cada componente, pricePredictionReturn y
+    finalRate, que puede ordenarse y filtrarse.
+    :history: informes trimestrales en formato largo (columna ticker y atributos de
+    GROWTH_ATTRIBUTES), ordenados de mas antiguo a mas reciente dentro de cada ticker
+    :latest: una fila por ticker (indice) con la ultima prediccion ("prediction"), el
+    ultimo precio y el maximo de la serie de precios ("currentPrice", "maxPrice") y los
+    ratios del ultimo informe junto a su precio ("sharePrice")
+    """
+    return combine_scores(growth_scores(history).reindex(latest.index), latest)
+
+
+def rate_history(history: pd.DataFrame, latest: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula la calificacion de una empresa en cada uno de sus trimestres en una sola
+    pasada, con ventanas moviles de GMGR_PERIODS informes para el GMGR. Cada trimestre se
+    califica solo con los datos disponibles en su fecha. Devuelve una tabla con el mismo
+    indice que latest y las columnas de rate_universe.
+    :history: informes trimestrales de la empresa, de mas antiguo a mas reciente
+    :latest: una fila por trimestre a calificar con las columnas de rate_universe y
+    "report", la posicion en history de su informe
+    """
+    growth = rolling_growth_scores(history).iloc[latest["report"].to_numpy()]
+    return combine_scores(growth.set_index(latest.index), latest)
+
+
+def combine_scores(growth: pd.DataFrame, latest: pd.DataFrame) -> pd.DataFrame:
+    """
+    Completa la tabla de calificacion a partir de la puntuacion de los atributos de
+    crecimiento de cada fila y de sus precios, prediccion y ratios (latest).
+    """
+    ratings = growth.join(ratio_scores(latest))
+
+    # Media de los atributos de cada componente (sumados en el mismo orden que las reglas)
+    for category, attributes in RATING_CATEGORIES.items():
+        total = ratings[attributes[0]]
+        for attribute in attributes[1:]:
+            total = total + ratings[attribute]
+        ratings[category] = total / len(attributes)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_return = (
+            (latest["prediction"] - latest["currentPrice"]) / latest["prediction"]
+        ) * 100
+    ratings["pricePredictionReturn"] = price_return.where(
+        ~(price_return < 0), 0
+    ).astype(float)
+
+    # Puntuación final, entre 0 y 100
+    categories_mean = (
+        ratings["growth"] + ratings["profitability"] + ratings["financialHealth"]
+    ) / len(RATING_CATEGORIES)
+    final_rate = (
+        ratings["pricePredictionReturn"] * (latest["currentPrice"] / latest["maxPrice"])
+        + categories_mean
+    )
+    ratings["finalRate"] = np.clip(np.trunc(final_rate), 0, 100).astype("Int64")
+    return ratings
+
+
+def growth_scores(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Puntuacion de los atributos de crecimiento de cada ticker: GMGR de los ultimos
+    GMGR_PERIODS informes con un factor de amplificacion de 10, entre -100 y 100.
+    """
+    recent = history.groupby("ticker", sort=False).tail(GMGR_PERIODS)
+    tickers, codes = np.unique(recent["ticker"].to_numpy(), return_inverse=True)
+    lengths = np.bincount(codes, minlength=len(tickers))
+    # Posicion de cada informe en la matriz (periodos, tickers), alineada al final
+    position = (
+        GMGR_PERIODS
+        - 1
+        - recent.groupby("ticker", sort=False).cumcount(ascending=False).to_numpy()
+    )
+
+    scores = {}
+    for attribute in GROWTH_ATTRIBUTES:
+        block = np.full((GMGR_PERIODS, len(tickers)), np.nan)
+        block[position, codes] = recent[attribute].to_numpy(dtype="float64")
+        rates = geometric_mean_growth_rates(block, lengths=lengths)
+        scores[attribute] = np.clip(rates * 10, -100, 100)
+    return pd.DataFrame(scores, index=pd.Index(tickers, name="ticker"))
+
+
+def rolling_growth_scores(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Puntuacion de los atributos de crecimiento de una empresa en cada informe, con el GMGR
+    de la ventana de los GMGR_PERIODS informes hasta el (los primeros informes tienen
+    ventanas mas cortas).
+    """
+    lengths = np.minimum(np.arange(1, len(history) + 1), GMGR_PERIODS)
+    padding = np.full(GMGR_PERIODS - 1, np.nan)
+    scores = {}
+    for attribute in GROWTH_ATTRIBUTES:
+        values = np.concatenate([padding, history[attribute].to_numpy(dtype="float64")])
+        # Matriz (periodos, informes): cada columna es la ventana que termina en el informe
+        windows = sliding_window_view(values, GMGR_PERIODS).T
+        rates = geometric_mean_growth_rates(windows, lengths=lengths)
+        scores[attribute] = np.clip(rates * 10, -100, 100)
+    return pd.DataFrame(scores, index=history.index)
+
+
+def rating_as_dict(rating: pd.Series) -> dict:
+    """
+    Convierte una fila de la tabla de calificacion al diccionario de la respuesta: las
+    puntuaciones de cada atributo agrupadas por componente, pricePredictionReturn y
+    finalRate (None si no puede calcularse).
+    """
+    scores = {
+        category: {attribute: int(rating[attribute]) for attribute in attributes}
+        for category, attributes in RATING_CATEGORIES.items()
+    }
+    scores["pricePredictionReturn"] = float(rating["pricePredictionReturn"])
+    scores["finalRate"] = (
+        None if pd.isna(rating["finalRate"]) else int(rating["finalRate"])
+    )
+    return scores
+
+
+def ratio_scores(latest: pd.DataFrame) -> pd.DataFrame:
+    """
+    Puntuacion de los ratios de cada ticker. El Debt To Equity y el Price To Book Value se
+    puntuan con su inversa; los ratios sin dato puntuan 0.
+    """
+    values = latest[list(RATIO_THRESHOLDS)].astype("float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inverse = values.assign(
+            debtEquityRatio=1 / values["debtEquityRatio"],
+            bookValue=1 / (latest["sharePrice"] / values["bookValue"]),
+        )
+        scores = {}
+        for attribute, threshold in RATIO_THRESHOLDS.items():
+            value = inverse[attribute].to_numpy()
+            # Por encima del threshold: maxima nota; por debajo de -3: factor de
+            # amplificacion; en otro caso en funcion de la distancia al threshold.
+            # Siempre con -100 como limite inferior
+            score = np.select(
+                [value >= threshold, value < -3],
+                [100.0, np.maximum(10 * value / threshold, -100)],
+                np.maximum(100 * (value / threshold), -100),
+            )
+            scores[attribute] = np.where(values[attribute].isna(), 0.0, score)
+    return pd.DataFrame(scores, index=latest.index)
@@ -0,0 +1,117 @@
+"""
+Modulo encargado de la cache de las respuestas completas del backend, en memoria del
+proceso y en disco (compartida entre workers).
+"""
+
+# pylint: disable=E0401
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import os
+import threading
+import time
+from disk_cache import DiskCache
+from metrics import cache_requests
+
+
+# Entradas en memoria por worker y TTL (segundos) de cada nivel de la cache
+RESPONSE_CACHE_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", "128"))
+RESPONSE_CACHE_MEMORY_TTL = int(os.getenv("RESPONSE_CACHE_MEMORY_TTL", "300"))
+RESPONSE_CACHE_DISK_TTL = int(os.getenv("RESPONSE_CACHE_DISK_TTL", str(6 * 3600)))
+
+
+@dataclass
+class ResponseCache:
+    """
+    Cache de respuestas serializadas en dos niveles: un LRU acotado en memoria y una
+    DiskCache compartida. Cada clave guarda una unica respuesta junto a la version de los
+    datos con la que se calculo, y solo se devuelve si esa version coincide con la actual,
+    por lo que al cambiar los datos o el modelo las respuestas anteriores dejan de usarse.
+    :disk: cache en disco compartida entre workers
+    :max_entries: numero maximo de respuestas en memoria
+    :memory_ttl: segundos que se conserva una respuesta en memoria
+    :disk_ttl: segundos que se conserva una respuesta en disco
+    """
+
+    disk: DiskCache
+    max_entries: int = RESPONSE_CACHE_ENTRIES
+    memory_ttl: float = RESPONSE_CACHE_MEMORY_TTL
+    disk_ttl: float = RESPONSE_CACHE_DISK_TTL
+    _memory: OrderedDict = field(default_factory=OrderedDict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def get(self, key: tuple, version: str) -> bytes:
+        """
+        Devuelve la respuesta guardada para la clave si se calculo con version y no ha
+        caducado, buscandola primero en memoria y despues en disco. En otro caso (o si
+        version es None) devuelve None.
+        """
+        # Las respuestas siempre se guardan con version: sin version no hay coincidencia
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                entry_version, created, body = entry
+                if (
+                    entry_version == version
+                    and time.time() - created <= self.memory_ttl
+                ):
+                    self._memory.move_to_end(key)
+                    cache_requests.inc(cache="responses_memory", result="hit")
+                    return body
+                del self._memory[key]
+        cache_requests.inc(cache="responses_memory", result="miss")
+
+        stored = self.disk.get(("RESPONSE", *key), self.disk_ttl)
+        if stored is None or stored["version"] != version:
+            cache_requests.inc(cache="responses_disk", result="miss")
+            return None
+        cache_requests.inc(cache="responses_disk", result="hit")
+        body = stored["body"].encode("utf-8")
+        self.__remember(key, version, body)
+        return body
+
+    def is_fresh(self, key: tuple, version: str) -> bool:
+        """
+        Indica si hay una respuesta guardada para la clave, calculada con version y sin
+        caducar, en alguno de los dos niveles. A diferencia de get, no cambia el orden del
+        LRU, no carga en memoria la respuesta de disco ni cuenta en las metricas, por lo
+        que sirve para el precalculo sin desplazar las respuestas que leen los usuarios.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            entry_version, created, _ = entry
+            if entry_version == version and time.time() - created <= self.memory_ttl:
+                return True
+        stored = self.disk.get(("RESPONSE", *key), self.disk_ttl, touch=False)
+        return stored is not None and stored["version"] == version
+
+    def set(self, key: tuple, version: str, body: bytes):
+        """
+        Guarda la respuesta serializada (JSON en utf-8) de la clave, calculada con version,
+        en los dos niveles.
+        """
+        self.__remember(key, version, body)
+        self.disk.set(("RESPONSE", *key), {"version": version, "body": body.decode()})
+
+    def invalidate(self, *keys: tuple):
+        """
+        Elimina de los dos niveles las respuestas guardadas para las claves.
+        """
+        with self._lock:
+            for key in keys:
+                self._memory.pop(key, None)
+        for key in keys:
+            self.disk.delete(("RESPONSE", *key))
+
+    # Metodos auxiliares
+
+    def __remember(self, key: tuple, version: str, body: bytes):
+        """
+        Guarda la respuesta en memoria, expulsando la usada hace mas tiempo si se supera
+        max_entries.
+        """
+        with self._lock:
+            self._memory[key] = (version, time.time(), body)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
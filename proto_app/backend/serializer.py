@@ -0,0 +1,88 @@
+"""
+Modulo encargado de serializar las respuestas del backend a JSON en una sola pasada.
+"""
+
+# pylint: disable=E0401,E1101
+from datetime import date
+import json
+import math
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # sin orjson se usa el modulo json de la libreria estandar
+    orjson = None
+
+
+JSON_MIMETYPE = "application/json"
+SSE_MIMETYPE = "text/event-stream"
+
+
+def to_json(payload: any) -> bytes:
+    """
+    Serializa la respuesta a JSON (utf-8). Los valores no finitos (NaN, inf) se escriben
+    como null, los tipos de numpy como su valor nativo y las fechas en formato ISO.
+    Con orjson la respuesta se codifica directamente, sin copias intermedias; sin orjson
+    se recorre antes para sustituir los valores no finitos.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            payload, default=encode_value, option=orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(
+        finite_values(payload), default=encode_value, allow_nan=False
+    ).encode("utf-8")
+
+
+def embed_json(payload: dict, key: str, raw: bytes) -> bytes:
+    """
+    Serializa el diccionario payload añadiendo en key un valor ya serializado a JSON
+    (raw, por ejemplo una respuesta de la cache), sin decodificarlo de nuevo.
+    """
+    head = to_json(payload)[:-1]
+    separator = b"," if payload else b""
+    return head + separator + to_json(key) + b":" + raw + b"}"
+
+
+def to_sse(event: str, payload: any) -> bytes:
+    """
+    Serializa un evento de Server-Sent Events con nombre event y payload en JSON como
+    datos (en una sola linea: la salida de to_json no contiene saltos de linea).
+    """
+    return sse_event(event, to_json(payload))
+
+
+def sse_event(event: str, data: bytes) -> bytes:
+    """
+    Serializa un evento de Server-Sent Events con datos ya serializados a JSON.
+    """
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + data + b"\n\n"
+
+
+def encode_value(value: any) -> any:
+    """
+    Funcion auxiliar que convierte los tipos que no sabe codificar el backend de JSON.
+    """
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (pd.Timestamp, date)):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return finite_values(value.tolist())
+    if isinstance(value, np.generic):
+        return finite_values(value.item())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def finite_values(payload: any) -> any:
+    """
+    Funcion auxiliar que devuelve una copia de payload con los valores no finitos a None.
+    """
+    if isinstance(payload, dict):
+        return {key: finite_values(value) for key, value in payload.items()}
+    if isinstance(payload, (list, tuple)):
+        return [finite_values(value) for value in payload]
+    if isinstance(payload, float) and not math.isfinite(payload):
+        return None
+    return payload
@@ -0,0 +1,52 @@
+"""
+Modulo encargado de agrupar las peticiones concurrentes que realizan el mismo calculo.
+"""
+
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+import threading
+
+
+@dataclass
+class SingleFlight:
+    """
+    Clase para la agrupacion de llamadas concurrentes: mientras un calculo con una clave
+    esta en curso, el resto de llamadas con la misma clave esperan a que termine y reciben
+    el mismo resultado (o la misma excepcion) en lugar de repetirlo.
+    """
+
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _calls: dict = field(default_factory=dict, repr=False)
+
+    def do(self, key: str, function: callable, *args, **kwargs) -> any:
+        """
+        Ejecuta function(*args, **kwargs) si no hay ningun calculo en curso para la clave,
+        o espera al que ya esta en curso. Devuelve el resultado del calculo.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return result
+
+    def in_flight(self, key: str) -> bool:
+        """
+        Indica si hay un calculo en curso para la clave.
+        """
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,147 @@
+"""
+Fixtures compartidas por las baterias de pruebas del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621,R0903
+from joblib import dump
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import clone
+import data_manager
+from data_manager_aux import STATEMENT_SCHEMAS
+from disk_cache import DiskCache
+from model_pool import ModelPool
+from response_cache import ResponseCache
+
+
+def synthetic_alphavantage(ticker: str, n_quarters: int = 40) -> dict:
+    """
+    Funcion auxiliar que genera respuestas sinteticas de AlphaVantage para un ticker,
+    siempre las mismas para el mismo ticker: n_quarters informes trimestrales de cada
+    estado financiero (del mas reciente al mas antiguo), precios mensuales hasta hoy y la
+    descripcion general.
+    """
+    rng = np.random.default_rng(sum(map(ord, ticker)))
+    today = pd.Timestamp.today().normalize()
+    quarters = pd.date_range(
+        end=today, periods=n_quarters, freq=pd.offsets.QuarterEnd()
+    )[::-1]
+    trend = 1.02 ** np.arange(n_quarters)[::-1]
+    responses = {}
+    for statement, schema in STATEMENT_SCHEMAS.items():
+        columns = [column for column, dtype in schema.items() if dtype == "float64"]
+        values = rng.uniform(0.5, 1.5, (n_quarters, len(columns))) * trend[:, None]
+        responses[statement] = {
+            "symbol": ticker,
+            "quarterlyReports": [
+                {
+                    "fiscalDateEnding": quarter.strftime("%Y-%m-%d"),
+                    "reportedCurrency": "USD",
+                    **{
+                        column: str(int(value * 1e9))
+                        for column, value in zip(columns, row)
+                    },
+                }
+                for quarter, row in zip(quarters, values)
+            ],
+        }
+    months = pd.date_range(
+        end=today, periods=3 * n_quarters + 12, freq=pd.offsets.MonthEnd()
+    )[::-1]
+    prices = (
+        100 * 1.01 ** np.arange(len(months))[::-1] * rng.uniform(0.9, 1.1, len(months))
+    )
+    responses["TIME_SERIES_MONTHLY_ADJUSTED"] = {
+        "Meta Data": {"2. Symbol": ticker},
+        "Monthly Adjusted Time Series": {
+            month.strftime("%Y-%m-%d"): {"5. adjusted close": f"{price:.2f}"}
+            for month, price in zip(months, prices)
+        },
+    }
+    responses["OVERVIEW"] = {"Symbol": ticker, "Name": ticker, "Sector": "TECHNOLOGY"}
+    return responses
+
+
+class SyntheticResponse:
+    """
+    Respuesta HTTP de AlphaVantage con un json ya generado.
+    """
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+
+    def json(self) -> dict:
+        """
+        Devuelve el json de la respuesta.
+        """
+        return self.payload
+
+
+class SyntheticSession:
+    """
+    Sesion HTTP que responde a las consultas a AlphaVantage con datos sinteticos y guarda
+    las llamadas recibidas (funcion, ticker). El ticker INVALID no existe: su descripcion
+    general llega vacia, como en la API real.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):  # pylint: disable=W0613
+        """
+        Devuelve la respuesta sintetica de la funcion y el ticker de params.
+        """
+        self.calls.append((params["function"], params["symbol"]))
+        if params["symbol"].upper() == "INVALID":
+            return SyntheticResponse({})
+        return SyntheticResponse(
+            synthetic_alphavantage(params["symbol"].upper())[params["function"]]
+        )
+
+
+@pytest.fixture
+def alphavantage_offline(monkeypatch, tmp_path):
+    """
+    Fixture de pytest que sustituye la sesion HTTP de AlphaVantage por una con datos
+    sinteticos, sin esperar al limitador de la API y con una cache en disco vacia en un
+    directorio temporal. Devuelve la sesion, para consultar las llamadas realizadas.
+    """
+    session = SyntheticSession()
+    monkeypatch.setattr(data_manager, "session", session)
+    monkeypatch.setattr(
+        data_manager, "request_with_rate_limit", lambda request, reserve=None: request()
+    )
+    monkeypatch.setattr(
+        data_manager, "alphavantage_cache", DiskCache(str(tmp_path / "alphavantage"))
+    )
+    return session
+
+
+@pytest.fixture
+def small_model(monkeypatch, tmp_path):
+    """
+    Fixture de pytest que sustituye el modelo por una copia reducida (menos arboles) del
+    pipeline entrenado, para que los reentrenamientos del walk-forward sean rapidos, y la
+    cache de predicciones por una vacia en un directorio temporal.
+    """
+    model = clone(data_manager.model_pool.prototype)
+    path = str(tmp_path / "model.joblib")
+    dump(model.set_params(regressor__n_estimators=10), path)
+    monkeypatch.setattr(data_manager, "model_pool", ModelPool(path))
+    monkeypatch.setattr(
+        data_manager, "predictions_cache", DiskCache(str(tmp_path / "predictions"))
+    )
+
+
+@pytest.fixture
+def response_cache(monkeypatch, tmp_path):
+    """
+    Fixture de pytest que sustituye la cache de respuestas de la app por una vacia en un
+    directorio temporal. Devuelve la cache.
+    """
+    import app  # pylint: disable=C0415
+
+    cache = ResponseCache(DiskCache(str(tmp_path / "responses")))
+    monkeypatch.setattr(app, "respuestas_cacheadas", cache)
+    return cache
@@ -4,11 +4,15 @@ Bateria de pruebas para el backend de la app
 
 # pylint: disable=C0413,E0401,E0402,W0621
 import pathlib
+import threading
+import time
 import pytest
 from flask import json
-from app import app
+import app as app_module
+from app import app, precalculo
 from jsonschema import validate
 from jsonschema.exceptions import ValidationError
+from job_manager import DONE, PENDING, RUNNING, JobManager
 
 
 @pytest.fixture
@@ -91,3 +95,224 @@ def test_api_ticker_invalido(client):
 
     assert "Error" in data
     assert data["Error"] == "Ticker (INVALID) data not available"
+
+
+@pytest.mark.usefixtures("alphavantage_offline", "small_model")
+def test_api_lote_tickers(client):
+    """
+    Test ID: TU-APP-03
+    Covered Requirement:
+        RF-08: Peticiones satisfactorias al backend
+        RNF-03: Tratamiento de errores
+
+    Este test verifica que el sistema es capaz de calificar una lista de tickers en una
+    sola petición, devolviendo una respuesta por ticker sin que un ticker inválido
+    interrumpa el resto del lote.
+
+    Metodología: Se simula una petición POST a la API de lotes con un ticker válido y
+    otro inválido, con datos sinteticos de AlphaVantage (sin conexion), y se lee la
+    respuesta en streaming línea a línea.
+
+    Salida Esperada: El sistema debe devolver una línea JSON por ticker: la del ticker
+    válido con la estructura de respuesta completa y la del inválido con un mensaje de error.
+    """
+    response = client.post(
+        "/api/lote",
+        data=json.dumps({"tickers": ["AAPL", "INVALID"]}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    lineas = [json.loads(linea) for linea in response.data.decode().splitlines()]
+    respuestas = {linea["ticker"]: linea["respuesta"] for linea in lineas}
+
+    assert set(respuestas) == {"AAPL", "INVALID"}
+    validate_payload(respuestas["AAPL"], "schema_response.json")
+    assert respuestas["INVALID"]["Error"] == "Ticker (INVALID) data not available"
+
+
+def test_precalculo_no_arranca_en_pruebas(client):
+    """
+    Test ID: TU-APP-04
+    Covered Requirement:
+        RNF-01: Rendimiento del backend
+
+    Este test verifica que el precálculo en segundo plano no se lanza al importar el
+    módulo de la app ni al atender peticiones en modo de pruebas.
+
+    Metodología: Se importa la app, se simula una petición a la API de métricas y se
+    consulta el hilo del precálculo.
+
+    Salida Esperada: El hilo del precálculo no se ha creado.
+    """
+    assert client.get("/metrics").status_code == 200
+    assert precalculo._thread is None  # pylint: disable=W0212
+
+
+def leer_eventos(data: bytes) -> list:
+    """
+    Funcion auxiliar que devuelve la lista de eventos (nombre, datos) de un flujo SSE
+    """
+    eventos = []
+    for bloque in data.decode("utf-8").strip().split("\n\n"):
+        evento, datos = bloque.split("\n", 1)
+        eventos.append(
+            (evento.removeprefix("event: "), json.loads(datos.removeprefix("data: ")))
+        )
+    return eventos
+
+
+@pytest.mark.usefixtures("alphavantage_offline", "small_model", "response_cache")
+def test_api_eventos_ticker(client):
+    """
+    Test ID: TU-APP-05
+    Covered Requirement:
+        RF-08: Peticiones satisfactorias al backend
+
+    Este test verifica que la API de eventos envía los datos de un ticker según termina
+    cada etapa, que la respuesta completa queda en la cache y que un ticker invalido
+    recibe un evento de error.
+
+    Metodología: Se simula una petición a la API de eventos de un ticker con datos
+    sinteticos dos veces, y otra con un ticker invalido.
+
+    Salida Esperada: La primera petición recibe los eventos de cada etapa en orden y un
+    evento "fin" vacío; la segunda solo un evento "fin" con la respuesta calculada; y la
+    del ticker invalido un evento "error" seguido de "fin".
+    """
+    response = client.get("/api/datos/AAPL/eventos")
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    eventos = leer_eventos(response.data)
+    assert [evento for evento, _ in eventos] == [
+        "datos_financieros",
+        "series",
+        "predicciones",
+        "calificacion",
+        "fin",
+    ]
+    assert eventos[-1][1] == {}
+    calificacion = eventos[3][1]
+
+    eventos = leer_eventos(client.get("/api/datos/AAPL/eventos").data)
+    assert [evento for evento, _ in eventos] == ["fin"]
+    assert eventos[0][1]["calificacion"] == calificacion
+
+    eventos = leer_eventos(client.get("/api/datos/INVALID/eventos").data)
+    assert [evento for evento, _ in eventos] == ["error", "fin"]
+    assert "Error" in eventos[0][1]
+
+
+@pytest.mark.usefixtures("alphavantage_offline", "small_model", "response_cache")
+def test_api_trabajos(client, monkeypatch):
+    """
+    Test ID: TU-APP-06
+    Covered Requirement:
+        RF-08: Peticiones satisfactorias al backend
+
+    Este test verifica que la API de trabajos acepta el cálculo de un ticker en segundo
+    plano, que su estado se puede consultar hasta que termina, que se rechazan los
+    trabajos cuando la cola está llena y que un trabajo desconocido no se encuentra.
+
+    Metodología: Se sustituye el gestor de trabajos por uno que admite un solo trabajo
+    sin terminar y se retiene el cálculo hasta consultar el trabajo; mientras tanto se
+    envía otro ticker. Después se espera al resultado y se consulta un identificador
+    que no existe.
+
+    Salida Esperada: El envío devuelve un 202 con la cabecera Location; la consulta, un
+    202 pendiente o en curso y, al terminar, un 200 con la respuesta; el segundo envío,
+    un 503 con Retry-After; y el trabajo desconocido, un 404.
+    """
+    monkeypatch.setattr(
+        app_module, "trabajos", JobManager(max_workers=1, max_pending=1)
+    )
+    liberar = threading.Event()
+    obtener = app_module.obtener_respuesta_serializada
+    monkeypatch.setattr(
+        app_module,
+        "obtener_respuesta_serializada",
+        lambda *args: liberar.wait(30) and obtener(*args),
+    )
+
+    response = client.post("/api/trabajos", json={"ticker": "AAPL"})
+    assert response.status_code == 202
+    trabajo = json.loads(response.data)
+    assert response.headers["Location"] == f"/api/trabajos/{trabajo['id']}"
+    assert trabajo["estado"] in (PENDING, RUNNING)
+
+    response = client.get(response.headers["Location"])
+    assert response.status_code == 202
+    assert json.loads(response.data)["estado"] in (PENDING, RUNNING)
+    assert "respuesta" not in json.loads(response.data)
+
+    lleno = client.post("/api/trabajos", json={"ticker": "MSFT"})
+    assert lleno.status_code == 503
+    assert "Retry-After" in lleno.headers
+    assert "Error" in json.loads(lleno.data)
+
+    liberar.set()
+    response = client.get(f"/api/trabajos/{trabajo['id']}?espera=30")
+    assert response.status_code == 200
+    terminado = json.loads(response.data)
+    assert terminado["estado"] == DONE
+    assert "calificacion" in terminado["respuesta"]
+
+    desconocido = client.get("/api/trabajos/desconocido")
+    assert desconocido.status_code == 404
+    assert "Error" in json.loads(desconocido.data)
+    app_module.trabajos.shutdown()
+
+
+@pytest.mark.usefixtures("small_model", "response_cache")
+def test_api_peticiones_concurrentes(alphavantage_offline, monkeypatch):
+    """
+    Test ID: TU-APP-07
+    Covered Requirement:
+        RNF-01: Rendimiento del backend
+
+    Este test verifica que las peticiones concurrentes de un mismo ticker comparten un
+    único cálculo y una única descarga de sus datos.
+
+    Metodología: Se simulan varias peticiones a la API del mismo ticker a la vez desde
+    distintos hilos, reteniendo el cálculo hasta que todas han llegado, y se cuentan los
+    cálculos y las descargas de la descripción general realizados.
+
+    Salida Esperada: Todas las peticiones reciben la misma respuesta, con un solo cálculo
+    y una sola descarga.
+    """
+    app.config["TESTING"] = True
+    n_peticiones = 4
+    llegadas, calculos = [], []
+    liberar = threading.Event()
+    compartida = app_module.calcular_respuesta_compartida
+    calcular = app_module.calcular_respuesta
+    monkeypatch.setattr(
+        app_module,
+        "calcular_respuesta_compartida",
+        lambda *args: llegadas.append(args) or compartida(*args),
+    )
+    monkeypatch.setattr(
+        app_module,
+        "calcular_respuesta",
+        lambda *args: calculos.append(args) or liberar.wait(30) and calcular(*args),
+    )
+
+    respuestas = [None] * n_peticiones
+
+    def consultar(i):
+        respuestas[i] = app.test_client().get("/api/datos/AAPL").data
+
+    hilos = [threading.Thread(target=consultar, args=(i,)) for i in range(n_peticiones)]
+    for hilo in hilos:
+        hilo.start()
+    while len(llegadas) < n_peticiones:
+        time.sleep(0.01)
+    # Margen para que las peticiones que han llegado esperen al calculo en curso
+    time.sleep(0.2)
+    liberar.set()
+    for hilo in hilos:
+        hilo.join(60)
+
+    assert len(calculos) == 1
+    assert alphavantage_offline.calls.count(("OVERVIEW", "AAPL")) == 1
+    assert len(set(respuestas)) == 1
+    assert "calificacion" in json.loads(respuestas[0])
@@ -4,8 +4,11 @@ Bateria de pruebas para el modulo de data_manager del backend
 
 # pylint: disable=C0413,E0401,E0402,W0621
 import json
+import os
 import pathlib
+import data_manager as data_manager_module
 from data_manager import DataManager
+from metrics import model_seconds
 from jsonschema import validate
 from jsonschema.exceptions import ValidationError
 import pytest
@@ -165,3 +168,91 @@ def test_preparar_respuesta(data_manager):
     """
     response = data_manager.prepare_response()
     validate_payload(response, "schema_response.json")
+
+
+def walk_forward(ticker: str, **options) -> tuple:
+    """
+    Funcion auxiliar que descarga y prepara los datos del ticker y devuelve sus
+    predicciones y su calificacion, con una cache de predicciones vacia.
+    """
+    data_manager_module.predictions_cache.clear()
+    dm = DataManager(ticker=ticker)
+    dm.download_financial_data()
+    dm.preprocess_financial_data()
+    predictions = list(dm.make_predictions(**options))
+    return predictions, dm.calculate_rating()
+
+
+@pytest.mark.usefixtures("alphavantage_offline", "small_model")
+def test_walk_forward_rapido():
+    """
+    Test ID: TU-DM-06
+    Requisito cubierto: RF-03: Prediccion del precio de las acciones
+
+    Este test verifica que el walk-forward en modo rapido, que reentrena el modelo solo
+    cada pocos trimestres, siempre reentrena con todos los trimestres conocidos antes de
+    la prediccion final, por lo que no cambia la calificacion.
+
+    Metodología: Se realizan las predicciones de un ticker con datos sinteticos en modo
+    exacto y en modo rapido y se calcula su calificacion.
+
+    Salida esperada: Ambos modos devuelven el mismo numero de predicciones, la misma
+    prediccion final y la misma calificacion.
+    """
+    exact, exact_rating = walk_forward("AAPL", mode="exact", n_jobs=1)
+    fast, fast_rating = walk_forward("AAPL", mode="fast", n_jobs=1)
+
+    assert len(fast) == len(exact)
+    assert fast[-1] == exact[-1]
+    assert fast_rating == exact_rating
+
+
+@pytest.mark.usefixtures("alphavantage_offline", "small_model")
+def test_walk_forward_paralelo():
+    """
+    Test ID: TU-DM-07
+    Requisito cubierto: RF-03: Prediccion del precio de las acciones
+
+    Este test verifica que repartir los reentrenamientos del walk-forward entre varios
+    procesos no cambia ningun resultado.
+
+    Metodología: Se realizan las predicciones de un ticker con datos sinteticos en serie
+    y con dos procesos y se calcula su calificacion.
+
+    Salida esperada: Las predicciones y la calificacion son exactamente iguales.
+    """
+    serial, serial_rating = walk_forward("MSFT", mode="exact", n_jobs=1)
+    parallel, parallel_rating = walk_forward("MSFT", mode="exact", n_jobs=2)
+
+    assert parallel == serial
+    assert parallel_rating == serial_rating
+
+
+@pytest.mark.usefixtures("alphavantage_offline", "small_model")
+def test_cache_predicciones_walk_forward():
+    """
+    Test ID: TU-DM-08
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que las predicciones de todos los pasos del walk-forward de un
+    ticker se guardan en una sola entrada de la cache y que otra peticion con los mismos
+    datos las reutiliza sin reentrenar el modelo.
+
+    Metodología: Se realizan las predicciones de un ticker con datos sinteticos dos veces,
+    contando los ficheros de la cache y los reentrenamientos del modelo.
+
+    Salida esperada: La cache contiene una unica entrada y la segunda peticion devuelve
+    las mismas predicciones sin ningun reentrenamiento.
+    """
+    fits = model_seconds.count(operation="fit")
+    first, _ = walk_forward("XOM", mode="exact", n_jobs=1)
+    assert model_seconds.count(operation="fit") > fits
+    cache_dir = data_manager_module.predictions_cache.directory
+    assert len(os.listdir(cache_dir)) == 1
+
+    dm = DataManager(ticker="XOM")
+    dm.download_financial_data()
+    dm.preprocess_financial_data()
+    fits = model_seconds.count(operation="fit")
+    assert list(dm.make_predictions(mode="exact", n_jobs=1)) == first
+    assert model_seconds.count(operation="fit") == fits
@@ -0,0 +1,224 @@
+"""
+Bateria de pruebas para las funciones auxiliares de data_manager_aux
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+import numpy as np
+import pandas as pd
+import pytest
+from data_manager_aux import (
+    STATEMENT_SCHEMAS,
+    closest_prices_from_df,
+    compute_ratios,
+    geometric_mean_growth_rates,
+    join_statements,
+    parse_statement,
+    row_hashes,
+    rows_fingerprint,
+)
+
+
+def test_calculo_vectorizado_ratios():
+    """
+    Test ID: TU-AUX-01
+    Requisito cubierto: RF-02: Preprocesamiento de los datos
+
+    Este test verifica que los ratios financieros se calculan correctamente sobre un
+    dataframe con varios tickers, y que las divisiones por cero y los valores no numericos
+    se convierten en NaN.
+
+    Metodología: Se calculan los ratios de un dataframe de tres tickers con un patrimonio
+    neto nulo, un valor "None" y un numero de acciones nulo (del que depende el P/E).
+
+    Salida esperada: Los ratios coinciden con el calculo fila a fila y los casos no
+    validos toman valor NaN, tambien en los ratios calculados a partir de otros.
+    """
+    data = pd.DataFrame(
+        {
+            "symbol": ["AAPL", "AAPL", "MSFT", "XOM"],
+            "netIncome": [10.0, 20.0, "None", 8.0],
+            "commonStock": [5.0, 10.0, 2.0, 0.0],
+            "sharePrice": [100.0, 150.0, 300.0, 60.0],
+            "totalShareholderEquity": [50.0, 0.0, 40.0, 40.0],
+            "totalAssets": [200.0, 250.0, 100.0, 100.0],
+            "totalLiabilities": [150.0, 250.0, 60.0, 60.0],
+            "commonStockSharesOutstanding": [10.0, 10.0, 20.0, 10.0],
+            "totalCurrentAssets": [30.0, 40.0, 50.0, 20.0],
+            "totalCurrentLiabilities": [15.0, 20.0, 0.0, 10.0],
+            "operatingCashflow": [12.0, 18.0, 9.0, 6.0],
+            "capitalExpenditures": [2.0, 3.0, 4.0, 1.0],
+        }
+    )
+    ratios = compute_ratios(data)
+
+    np.testing.assert_allclose(ratios["EPS"], [2.0, 2.0, np.nan, np.nan])
+    np.testing.assert_allclose(ratios["P/E"], [50.0, 75.0, np.nan, np.nan])
+    np.testing.assert_allclose(ratios["ROE"], [0.2, np.nan, np.nan, 0.2])
+    np.testing.assert_allclose(ratios["bookValue"], [5.0, 0.0, 2.0, 4.0])
+    np.testing.assert_allclose(ratios["currentRatio"], [2.0, 2.0, np.nan, 2.0])
+    np.testing.assert_allclose(ratios["debtEquityRatio"], [3.0, np.nan, 1.5, 1.5])
+    np.testing.assert_allclose(ratios["freeCashFlow"], [10.0, 15.0, 5.0, 5.0])
+
+
+def test_alineacion_precios_por_fecha():
+    """
+    Test ID: TU-AUX-02
+    Requisito cubierto: RF-02: Preprocesamiento de los datos
+
+    Este test verifica que a cada fecha objetivo se le asigna el precio de la fecha mas
+    cercana, siempre que no se aleje mas de 40 dias.
+
+    Metodología: Se buscan varias fechas (desordenadas) en una serie de precios mensual
+    ordenada de forma descendente, como la devuelve AlphaVantage.
+
+    Salida esperada: Los precios corresponden a la fecha mas cercana de cada objetivo, en
+    el orden de las fechas pedidas, y las fechas sin precio cercano toman valor NaN.
+    """
+    prices = pd.Series(
+        ["30.0", "20.0", "10.0"],
+        index=["2023-03-31", "2023-02-28", "2023-01-31"],
+    )
+    fechas = pd.to_datetime(["2023-03-10", "2022-12-31", "2023-05-05", "2023-06-30"])
+
+    np.testing.assert_allclose(
+        closest_prices_from_df(prices, fechas), [20.0, 10.0, 30.0, np.nan]
+    )
+
+
+def test_lectura_tipada_informes():
+    """
+    Test ID: TU-AUX-03
+    Requisito cubierto: RF-02: Preprocesamiento de los datos
+
+    Este test verifica que los informes trimestrales de AlphaVantage se convierten en un
+    dataframe con los tipos definidos en su esquema.
+
+    Metodología: Se convierten dos informes del estado de flujos de caja, con un valor
+    "None" y un campo ausente.
+
+    Salida esperada: Las fechas son datetime, la moneda es categorica, los importes son
+    float y los valores "None" o ausentes toman valor NaN.
+    """
+    reports = [
+        {
+            "fiscalDateEnding": "2023-12-31",
+            "reportedCurrency": "USD",
+            "operatingCashflow": "100",
+            "dividendPayout": "None",
+        },
+        {"fiscalDateEnding": "2023-09-30", "reportedCurrency": "USD"},
+    ]
+    df = parse_statement(reports, STATEMENT_SCHEMAS["CASH_FLOW"])
+
+    assert list(df.columns) == list(STATEMENT_SCHEMAS["CASH_FLOW"])
+    assert str(df["fiscalDateEnding"].dtype) == "datetime64[ns]"
+    assert str(df["reportedCurrency"].dtype) == "category"
+    assert df["operatingCashflow"].dtype == np.float64
+    np.testing.assert_allclose(df["operatingCashflow"], [100.0, np.nan])
+    assert df["dividendPayout"].isna().all()
+
+
+def test_union_estados_financieros():
+    """
+    Test ID: TU-AUX-04
+    Requisito cubierto: RF-02: Preprocesamiento de los datos
+
+    Este test verifica que los tres estados financieros se unen por fiscalDateEnding,
+    conservando las fechas del primero y tomando las columnas repetidas del primer estado
+    que las contiene.
+
+    Metodología: Se unen informes con fechas no coincidentes y la columna netIncome
+    presente (con valores distintos) en la cuenta de resultados y en el flujo de caja.
+
+    Salida esperada: El dataframe resultante esta ordenado por fecha, tiene una unica
+    columna netIncome con los valores de la cuenta de resultados y NaN donde faltan datos.
+    """
+    reports = {
+        "INCOME_STATEMENT": [
+            {"fiscalDateEnding": "2023-12-31", "netIncome": "20"},
+            {"fiscalDateEnding": "2023-09-30", "netIncome": "10"},
+        ],
+        "BALANCE_SHEET": [{"fiscalDateEnding": "2023-12-31", "totalAssets": "500"}],
+        "CASH_FLOW": [
+            {"fiscalDateEnding": "2023-12-31", "netIncome": "99"},
+            {"fiscalDateEnding": "2023-06-30", "operatingCashflow": "7"},
+        ],
+    }
+    df = join_statements(reports)
+
+    assert list(df["fiscalDateEnding"]) == list(
+        pd.to_datetime(["2023-09-30", "2023-12-31"])
+    )
+    assert list(df.columns).count("netIncome") == 1
+    np.testing.assert_allclose(df["netIncome"], [10.0, 20.0])
+    np.testing.assert_allclose(df["totalAssets"], [np.nan, 500.0])
+    assert df["operatingCashflow"].isna().all()
+
+
+def test_huella_tramos_entrenamiento():
+    """
+    Test ID: TU-AUX-05
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que la huella de un tramo de datos solo depende del contenido de
+    sus filas, de forma que las predicciones cacheadas se reutilizan al publicarse un
+    nuevo trimestre y se invalidan si cambian los datos del tramo.
+
+    Metodología: Se comparan las huellas del mismo tramo inicial antes y despues de añadir
+    una fila, y tras modificar un valor del tramo.
+
+    Salida esperada: La huella se mantiene al añadir filas posteriores y cambia al
+    modificar el contenido del tramo.
+    """
+    data = pd.DataFrame({"sharePrice": [10.0, 11.0], "symbol": ["AAPL", "AAPL"]})
+    extended = pd.concat(
+        [data, pd.DataFrame({"sharePrice": [12.0], "symbol": ["AAPL"]})],
+        ignore_index=True,
+    )
+    modified = data.assign(sharePrice=[10.0, 11.5])
+    prefix = slice(0, 2)
+
+    fingerprint = rows_fingerprint(row_hashes(data), prefix)
+    assert rows_fingerprint(row_hashes(extended), prefix) == fingerprint
+    assert rows_fingerprint(row_hashes(modified), prefix) != fingerprint
+
+
+def test_gmgr_vectorizado():
+    """
+    Test ID: TU-AUX-06
+    Requisito cubierto: RF-03: Calculo de la calificacion
+
+    Este test verifica que el GMGR vectorizado aplica las mismas reglas que el calculo
+    por columna: media geometrica de los crecimientos, exclusion de outliers, proporcion
+    minima 3:1 de periodos validos y crecimiento 0 en las celdas no numericas.
+
+    Metodología: Se calcula el GMGR de varias series a la vez (crecimiento constante,
+    un valor nulo, demasiados outliers y una celda no numerica) y de varias series de
+    distinta longitud en una sola matriz.
+
+    Salida esperada: Cada serie obtiene su GMGR esperado.
+    """
+    # Crecimiento constante del 10% segun la definicion (x_i - x_i-1) / x_i
+    steady = 100 / 0.9 ** np.arange(16)
+    # Cinco caidas del 60% (crecimiento -1.5, excluido): solo 10 periodos validos de 15
+    outliers = 100 * np.cumprod(np.where(np.arange(16) % 3 == 1, 0.4, 1 / 0.9))
+    text = np.where(np.arange(16) == 8, np.nan, steady)
+    numeric = np.ones((16, 4), dtype=bool)
+    numeric[8, 3] = False
+    values = np.column_stack(
+        [steady, np.where(np.arange(16) == 5, np.nan, steady), outliers, text]
+    )
+    rates = geometric_mean_growth_rates(values, numeric=numeric)
+
+    assert rates[0] == pytest.approx(10)
+    assert not rates[1]
+    assert not rates[2]
+    # Dos crecimientos pasan a 0: media geometrica de 13 factores 1.1 y dos factores 1
+    assert rates[3] == pytest.approx((1.1 ** (13 / 15) - 1) * 100)
+
+    # Varias series en una matriz, con las mas cortas rellenas al principio
+    block = np.column_stack([steady, np.where(np.arange(16) < 10, np.nan, steady)])
+    np.testing.assert_allclose(
+        geometric_mean_growth_rates(block, lengths=[16, 6]), [10, 10]
+    )
+    assert geometric_mean_growth_rates(block[-1:]).tolist() == [0, 0]
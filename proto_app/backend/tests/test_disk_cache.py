@@ -0,0 +1,100 @@
+"""
+Bateria de pruebas para el modulo disk_cache del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+import os
+import time
+from disk_cache import DiskCache
+import pytest
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """
+    Fixture de pytest para crear una cache vacia en un directorio temporal.
+    """
+    return DiskCache(str(tmp_path / "cache"), max_bytes=1024)
+
+
+def test_cache_ttl(cache):
+    """
+    Test ID: TU-DC-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que la cache devuelve los valores guardados mientras no hayan
+    superado su TTL, y que los considera caducados una vez superado.
+
+    Metodología: Se guarda una entrada y se consulta con un TTL amplio y con un TTL nulo.
+
+    Salida esperada: La primera consulta devuelve el valor guardado y la segunda None.
+    """
+    cache.set(("OVERVIEW", "AAPL"), {"Symbol": "AAPL"})
+    assert cache.get(("OVERVIEW", "AAPL"), ttl=3600) == {"Symbol": "AAPL"}
+    assert cache.get(("OVERVIEW", "AAPL"), ttl=-1) is None
+    assert cache.get(("OVERVIEW", "MSFT"), ttl=3600) is None
+
+
+def test_cache_expulsion_lru(cache):
+    """
+    Test ID: TU-DC-02
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que la cache no supera su tamaño maximo, expulsando las entradas
+    usadas hace mas tiempo, y que las escrituras no dejan ficheros temporales.
+
+    Metodología: Se guardan entradas hasta superar max_bytes, consultando la primera
+    entre medias para que sea la usada mas recientemente.
+
+    Salida esperada: La entrada consultada sobrevive, la menos usada se expulsa y el
+    directorio ocupa menos de max_bytes.
+    """
+    value = "x" * 400
+    cache.set(("k", 0), value)
+    cache.set(("k", 1), value)
+    # Forzamos fechas de uso distintas y marcamos la entrada 0 como la mas reciente
+    for i, key in enumerate([("k", 1), ("k", 0)]):
+        os.utime(cache._DiskCache__path(key), (time.time() + i, time.time() + i))
+    cache.set(("k", 2), value)
+    cache.set(("k", 3), value)
+
+    assert cache.get(("k", 1), ttl=3600) is None
+    assert cache.get(("k", 0), ttl=3600) == value
+    assert cache.get(("k", 3), ttl=3600) == value
+    files = os.listdir(cache.directory)
+    assert not [name for name in files if name.endswith(".tmp")]
+    assert sum(os.path.getsize(os.path.join(cache.directory, f)) for f in files) <= 1024
+
+
+def test_cache_expulsion_amortizada(tmp_path, monkeypatch):
+    """
+    Test ID: TU-DC-03
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que, con muchas escrituras, la cache sigue sin superar su tamaño
+    maximo y que no recorre el directorio completo en cada escritura.
+
+    Metodología: Se guardan cientos de entradas en una cache que solo admite unas
+    decenas, contando los recorridos del directorio, y se borra una de las que quedan.
+
+    Salida esperada: Tras cada escritura el directorio ocupa como mucho max_bytes, los
+    recorridos son menos de uno por cada cinco escrituras y las entradas mas recientes
+    siguen disponibles.
+    """
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=20 * 1024, scan_every=100)
+    scans = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scans.append(path) or scandir(path))
+    value = "x" * 400
+    for i in range(500):
+        cache.set(("k", i), value)
+        files = os.listdir(cache.directory)
+        assert sum(
+            os.path.getsize(os.path.join(cache.directory, f)) for f in files
+        ) <= (cache.max_bytes)
+
+    # Cada expulsion libera un 10% de max_bytes (unas 5 entradas de las ~46 que caben)
+    assert len(scans) < 500 / 5
+    assert cache.get(("k", 499), ttl=3600) == value
+    cache.delete(("k", 499))
+    assert cache.get(("k", 499), ttl=3600) is None
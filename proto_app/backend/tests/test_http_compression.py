@@ -0,0 +1,105 @@
+"""
+Bateria de pruebas para la compresion y las respuestas condicionales del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+import gzip
+import json
+from flask import Response
+from werkzeug.datastructures import Headers
+import pytest
+import app as app_module
+from app import app
+import data_manager
+from http_compression import MIN_COMPRESS_BYTES, compress_response
+
+
+def test_compresion_negociada():
+    """
+    Test ID: TU-CMP-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que las respuestas JSON se comprimen con gzip cuando el cliente lo
+    acepta, y que no se comprimen las respuestas pequeñas, de error o de otros tipos.
+
+    Metodología: Se comprime una respuesta JSON grande con distintas cabeceras
+    Accept-Encoding, y respuestas pequeñas, con estado 400 y de texto plano.
+
+    Salida esperada: Solo se comprime la respuesta JSON grande cuando se acepta gzip, con
+    su cabecera Content-Encoding, y al descomprimirla se obtiene el cuerpo original.
+    """
+    body = json.dumps({"serie": list(range(MIN_COMPRESS_BYTES))}).encode()
+
+    def compress(data, accept="gzip, deflate", **kwargs):
+        headers = Headers({"Accept-Encoding": accept})
+        with app.test_request_context(headers=headers) as context:
+            return compress_response(
+                Response(data, mimetype="application/json", **kwargs),
+                context.request.accept_encodings,
+            )
+
+    response = compress(body, accept="gzip;q=0.5, identity")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert gzip.decompress(response.get_data()) == body
+    assert int(response.headers["Content-Length"]) < len(body)
+
+    assert "Content-Encoding" not in compress(body, accept="identity").headers
+    assert "Content-Encoding" not in compress(b"{}").headers
+    assert "Content-Encoding" not in compress(body, status=400).headers
+    response = Response(body, mimetype="text/plain")
+    assert "Content-Encoding" not in compress_response(response, None).headers
+
+
+@pytest.mark.usefixtures("alphavantage_offline", "small_model", "response_cache")
+def test_respuesta_condicional(monkeypatch):
+    """
+    Test ID: TU-CMP-02
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que la respuesta incluye un ETag que depende de la version de los
+    datos y del modelo, que un cliente que envia If-None-Match con ese ETag recibe un 304
+    sin que se calcule ni se lea la respuesta, y que el ETag cambia al cambiar los datos.
+
+    Metodología: Se consulta un ticker con datos sinteticos sin If-None-Match, con el ETag
+    obtenido y tras guardar una nueva version de sus datos, contando las respuestas
+    obtenidas; y se consulta un ticker invalido.
+
+    Salida esperada: La primera respuesta es un 200 con ETag, la segunda un 304 vacio con
+    el mismo ETag sin obtener la respuesta, la posterior al cambio de datos un 200 con un
+    ETag distinto y la del ticker invalido un error sin ETag.
+    """
+    app.config["TESTING"] = True
+    client = app.test_client()
+    obtenidas = []
+    obtener = app_module.obtener_respuesta_serializada
+    monkeypatch.setattr(
+        app_module,
+        "obtener_respuesta_serializada",
+        lambda *args: obtenidas.append(args) or obtener(*args),
+    )
+
+    first = client.get("/api/datos/AAPL")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert etag.startswith("W/")
+    assert "no-cache" in first.headers["Cache-Control"]
+
+    cached = client.get("/api/datos/AAPL", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+    assert cached.headers["ETag"] == etag
+    assert len(obtenidas) == 1
+
+    # Nuevos datos de AlphaVantage para el ticker: cambia la version de la respuesta
+    overview = {"Symbol": "AAPL", "Name": "Apple", "Sector": "TECHNOLOGY"}
+    data_manager.alphavantage_cache.set(("OVERVIEW", "AAPL"), overview)
+    data_manager.store_data_version("OVERVIEW", "AAPL", overview)
+    changed = client.get("/api/datos/AAPL", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(obtenidas) == 2
+
+    invalid = client.get("/api/datos/INVALID")
+    assert "Error" in json.loads(invalid.data)
+    assert "ETag" not in invalid.headers
@@ -0,0 +1,98 @@
+"""
+Bateria de pruebas para el modulo job_manager del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+import queue
+import threading
+import time
+from job_manager import DONE, FAILED, PENDING, RUNNING, JobManager
+import pytest
+
+
+@pytest.fixture
+def manager():
+    """
+    Fixture de pytest para crear un gestor con un hilo y como mucho dos trabajos
+    pendientes.
+    """
+    manager = JobManager(max_workers=1, max_pending=2, ttl=60)
+    yield manager
+    manager.shutdown()
+
+
+def test_trabajos_segundo_plano(manager):
+    """
+    Test ID: TU-JM-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que el envio de un trabajo no espera al calculo, que los envios
+    del mismo calculo sin terminar comparten trabajo y que el resultado se obtiene al
+    consultar el trabajo esperando a que termine.
+
+    Metodología: Se envian dos veces un calculo bloqueado hasta que se libera un evento,
+    se consulta su estado y se espera su resultado.
+
+    Salida esperada: El envio es inmediato, ambos envios devuelven el mismo trabajo, que
+    pasa a estar completado con el resultado del calculo, ejecutado una sola vez.
+    """
+    release = threading.Event()
+    calls = []
+
+    def compute(ticker):
+        calls.append(ticker)
+        release.wait(5)
+        return {"ticker": ticker}
+
+    start = time.monotonic()
+    job = manager.submit("AAPL", compute, "AAPL")
+    assert manager.submit("AAPL", compute, "AAPL") is job
+    assert time.monotonic() - start < 0.5
+    assert manager.wait(job.id, timeout=0.1).status in (PENDING, RUNNING)
+    assert manager.pending() == 1
+
+    release.set()
+    assert manager.wait(job.id, timeout=5).as_dict() == {
+        "id": job.id,
+        "estado": DONE,
+        "respuesta": {"ticker": "AAPL"},
+    }
+    assert calls == ["AAPL"]
+    assert manager.pending() == 0
+    assert manager.get("desconocido") is None
+
+
+def test_limite_trabajos_y_errores(manager):
+    """
+    Test ID: TU-JM-02
+    Requisito cubierto: RNF-03: Tratamiento de errores
+
+    Este test verifica que el gestor rechaza trabajos por encima de su limite de
+    pendientes, que los errores del calculo se devuelven en el trabajo y que los trabajos
+    terminados se eliminan al caducar.
+
+    Metodología: Se envian tres trabajos bloqueados a un gestor con dos pendientes como
+    maximo y, tras liberarlos, un trabajo que lanza una excepcion con un ttl nulo.
+
+    Salida esperada: El tercer envio lanza queue.Full, el trabajo con error queda en
+    estado de error con su mensaje y desaparece al caducar.
+    """
+    release = threading.Event()
+    jobs = [manager.submit(ticker, release.wait, 5) for ticker in ("AAPL", "MSFT")]
+    with pytest.raises(queue.Full):
+        manager.submit("XOM", release.wait, 5)
+    release.set()
+    assert all(manager.wait(job.id, timeout=5).done for job in jobs)
+
+    def fail():
+        raise ValueError("Ticker no valido")
+
+    job = manager.submit("INVALID", fail)
+    assert manager.wait(job.id, timeout=5).as_dict() == {
+        "id": job.id,
+        "estado": FAILED,
+        "Error": "Ticker no valido",
+    }
+    manager.ttl = 0
+    time.sleep(0.01)
+    assert manager.get(job.id) is None
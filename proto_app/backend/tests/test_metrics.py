@@ -0,0 +1,97 @@
+"""
+Bateria de pruebas para las metricas y los logs del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+import json
+import logging
+from log_config import JsonFormatter
+from metrics import Registry
+import pytest
+
+
+def test_metricas_formato_prometheus():
+    """
+    Test ID: TU-MET-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que los contadores e histogramas acumulan sus valores por
+    etiquetas y se exponen en el formato de texto de Prometheus, y que las duraciones se
+    registran tambien cuando el bloque medido lanza una excepcion.
+
+    Metodología: Se incrementa un contador con dos combinaciones de etiquetas y se
+    observan duraciones en un histograma, con observe, como gestor de contexto y como
+    decorador de una funcion que falla.
+
+    Salida esperada: Las lineas expuestas contienen HELP, TYPE, los valores de cada
+    etiqueta, los intervalos acumulados, la suma y el numero de observaciones.
+    """
+    registry = Registry()
+    hits = registry.counter("cache_requests_total", "Consultas a la cache")
+    stages = registry.histogram("stage_seconds", "Duracion", buckets=(0.1, 1))
+    assert registry.counter("cache_requests_total", "Consultas a la cache") is hits
+
+    hits.inc(cache="alphavantage", result="hit")
+    hits.inc(2, cache="alphavantage", result="miss")
+    stages.observe(0.05, stage="download")
+    stages.observe(5, stage="download")
+    with stages.time(stage="rating"):
+        pass
+
+    @stages.time(stage="predictions")
+    def fail():
+        raise ValueError("Error en el modelo")
+
+    with pytest.raises(ValueError):
+        fail()
+
+    lines = registry.render().splitlines()
+    assert "# TYPE cache_requests_total counter" in lines
+    assert 'cache_requests_total{cache="alphavantage",result="miss"} 2' in lines
+    assert "# HELP stage_seconds Duracion" in lines
+    assert "# TYPE stage_seconds histogram" in lines
+    assert 'stage_seconds_bucket{stage="download",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="download",le="1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="download",le="+Inf"} 2' in lines
+    assert 'stage_seconds_sum{stage="download"} 5.05' in lines
+    assert 'stage_seconds_count{stage="download"} 2' in lines
+    assert stages.count(stage="rating") == 1
+    assert stages.count(stage="predictions") == 1
+    assert hits.value(cache="alphavantage", result="hit") == 1
+
+
+def test_logs_estructurados():
+    """
+    Test ID: TU-MET-02
+    Requisito cubierto: RNF-03: Tratamiento de errores
+
+    Este test verifica que los mensajes de log se escriben como una linea JSON con el
+    nivel, el logger, el mensaje y los campos adicionales del mensaje.
+
+    Metodología: Se formatea un mensaje con campos extra (ticker y funcion) y otro con
+    una excepcion.
+
+    Salida esperada: Cada mensaje es un objeto JSON en una sola linea con sus campos, y
+    el de la excepcion incluye su traza.
+    """
+    formatter = JsonFormatter()
+    record = logging.LogRecord("data_manager", logging.INFO, "", 0, "Datos", (), None)
+    record.ticker = "AAPL"
+    record.element = "OVERVIEW"
+
+    line = formatter.format(record)
+    entry = json.loads(line)
+    assert "\n" not in line
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "data_manager"
+    assert entry["message"] == "Datos"
+    assert entry["ticker"] == "AAPL" and entry["element"] == "OVERVIEW"
+
+    try:
+        raise ValueError("Ticker no valido")
+    except ValueError as e:
+        record = logging.LogRecord(
+            "app", logging.ERROR, "", 0, "Error", (), (type(e), e, e.__traceback__)
+        )
+    entry = json.loads(formatter.format(record))
+    assert "ValueError: Ticker no valido" in entry["exception"]
@@ -0,0 +1,71 @@
+"""
+Bateria de pruebas para el modulo model_pool del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+from joblib import dump
+from model_pool import ModelPool
+from sklearn.ensemble import GradientBoostingRegressor
+import pytest
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    """
+    Fixture de pytest para guardar un modelo sin entrenar en un fichero temporal.
+    """
+    path = str(tmp_path / "model.joblib")
+    dump(GradientBoostingRegressor(n_estimators=5, random_state=42), path)
+    return path
+
+
+def test_copias_independientes_modelo(model_path):
+    """
+    Test ID: TU-MP-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que cada peticion recibe su propia copia del modelo, con los mismos
+    hiperparametros que el modelo cargado, y que las copias devueltas se reutilizan.
+
+    Metodología: Se piden dos copias a la vez, se devuelven y se pide una tercera.
+
+    Salida esperada: Las dos copias simultaneas son objetos distintos entre si y del
+    prototipo, conservan sus hiperparametros y la tercera reutiliza una copia devuelta.
+    """
+    pool = ModelPool(model_path)
+    prototype = pool.prototype
+
+    with pool.model() as first, pool.model() as second:
+        assert first is not second
+        assert prototype not in (first, second)
+        assert first.get_params() == prototype.get_params()
+    with pool.model() as third:
+        assert third in (first, second)
+
+
+def test_carga_perezosa_y_recarga_modelo(model_path):
+    """
+    Test ID: TU-MP-02
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que el modelo solo se carga en su primer uso y que puede sustituirse
+    por un fichero nuevo sin crear otro pool.
+
+    Metodología: Se crea el pool, se consulta su version, se sobrescribe el fichero con un
+    modelo de otros hiperparametros mientras hay una copia prestada y se recarga.
+
+    Salida esperada: Crear el pool y consultar la version no carga el modelo; tras la
+    recarga cambian la version y los hiperparametros, y la copia prestada del modelo
+    anterior no se reutiliza.
+    """
+    pool = ModelPool(model_path)
+    version = pool.version
+    assert pool._prototype is None
+
+    with pool.model() as old:
+        dump(GradientBoostingRegressor(n_estimators=7, random_state=42), model_path)
+        pool.reload()
+    assert pool.version != version
+    with pool.model() as new:
+        assert new is not old
+        assert new.get_params()["n_estimators"] == 7
@@ -0,0 +1,83 @@
+"""
+Bateria de pruebas para el modulo prefetch del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+from prefetch import PrefetchScheduler
+from rate_limiter import TokenBucket
+import pytest
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    """
+    Fixture de pytest para crear un limitador de 6 tokens que se recarga muy despacio.
+    """
+    return TokenBucket(str(tmp_path / "bucket.json"), rate=0.001, capacity=6)
+
+
+def test_ranking_tickers_consultados(bucket):
+    """
+    Test ID: TU-PF-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que el planificador ordena los tickers por numero de consultas,
+    dando menos peso a las consultas antiguas, y que solo conserva los mas consultados.
+
+    Metodología: Se registran consultas de varios tickers en distintos instantes, con
+    una semivida de una hora y un maximo de dos tickers.
+
+    Salida esperada: Un ticker muy consultado hace dias queda por detras de uno
+    consultado ahora, y los tickers menos consultados se descartan.
+    """
+    scheduler = PrefetchScheduler(
+        lambda ticker: True, bucket, max_tickers=2, half_life=3600
+    )
+    now = 1_000_000.0
+    for _ in range(8):
+        scheduler.record("msft", now=now - 3 * 24 * 3600)
+    for _ in range(3):
+        scheduler.record("AAPL", now=now)
+    scheduler.record("XOM", now=now)
+
+    assert scheduler.hottest(now=now) == ["AAPL", "XOM"]
+    for i in range(30):
+        scheduler.record(f"T{i}", now=now - 60)
+    assert len(scheduler._scores) <= 20
+    assert scheduler.hottest(now=now)[0] == "AAPL"
+
+
+def test_ronda_precalculo_con_reserva(bucket):
+    """
+    Test ID: TU-PF-02
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que cada ronda precalcula los tickers mas consultados sin superar
+    su limite de tickers, que se detiene cuando el limitador no tiene tokens por encima
+    de la reserva y que un error en un ticker no interrumpe la ronda.
+
+    Metodología: Se ejecutan rondas con una funcion de precalculo que consume un token
+    por ticker (y falla para uno de ellos), con 6 tokens y una reserva de 2.
+
+    Salida esperada: La primera ronda se limita a per_round tickers, la segunda se
+    detiene al quedar solo los tokens reservados y el ticker con error no se cuenta.
+    """
+    calls = []
+
+    def refresh(ticker):
+        calls.append(ticker)
+        assert bucket.try_acquire(reserve=2)
+        if ticker == "MSFT":
+            raise RuntimeError("Ticker (MSFT) data not available")
+        return ticker != "XOM"
+
+    scheduler = PrefetchScheduler(refresh, bucket, per_round=2, reserve=2)
+    for count, ticker in enumerate(["AAPL", "MSFT", "XOM", "TSLA", "NVDA"]):
+        for _ in range(10 - count):
+            scheduler.record(ticker)
+
+    assert scheduler.run_once() == ["AAPL", "TSLA"]
+    assert calls == ["AAPL", "MSFT", "XOM", "TSLA"]
+    # Quedan 2 tokens libres (la reserva): la siguiente ronda no precalcula nada
+    assert scheduler.run_once() == []
+    assert len(calls) == 4
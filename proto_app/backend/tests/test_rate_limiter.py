@@ -0,0 +1,85 @@
+"""
+Bateria de pruebas para el modulo rate_limiter del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+from rate_limiter import TokenBucket, request_with_rate_limit
+import pytest
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    """
+    Fixture de pytest para crear un limitador de 2 tokens que se recarga a 10 tokens/s.
+    """
+    return TokenBucket(str(tmp_path / "bucket.json"), rate=10, capacity=2)
+
+
+def test_limitador_espera_minima(bucket):
+    """
+    Test ID: TU-RL-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que el limitador permite una rafaga del tamaño de su capacidad
+    y que, agotados los tokens, solo hace esperar el tiempo necesario para el siguiente.
+
+    Metodología: Se reservan tokens por encima de la capacidad y se comprueba el tiempo
+    de espera de cada reserva, asi como el error al pedir un token con un plazo menor.
+
+    Salida esperada: Las dos primeras reservas no esperan, la tercera espera ~1/rate
+    segundos y una reserva con plazo insuficiente lanza TimeoutError.
+    """
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.1, abs=0.02)
+    with pytest.raises(TimeoutError):
+        bucket.acquire(timeout=0.01)
+
+
+def test_reintentos_limite_api(bucket):
+    """
+    Test ID: TU-RL-02
+    Requisito cubierto: RNF-03: Tratamiento de errores
+
+    Este test verifica que las llamadas que reciben el aviso de limite de AlphaVantage
+    se reintentan hasta obtener una respuesta valida o agotar el plazo.
+
+    Metodología: Se simula una API que responde con el aviso "Note" en la primera
+    llamada, y otra que siempre lo devuelve.
+
+    Salida esperada: En el primer caso se devuelve la respuesta valida tras un reintento,
+    en el segundo se lanza TimeoutError.
+    """
+    responses = iter([{"Note": "API limit"}, {"Symbol": "AAPL"}])
+    assert request_with_rate_limit(lambda: next(responses), bucket, deadline=5) == {
+        "Symbol": "AAPL"
+    }
+    with pytest.raises(TimeoutError):
+        request_with_rate_limit(lambda: {"Note": "API limit"}, bucket, deadline=0.5)
+
+
+def test_reserva_tokens_segundo_plano(bucket):
+    """
+    Test ID: TU-RL-03
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que las llamadas en segundo plano solo obtienen un token si no
+    tienen que esperar y dejan libres los tokens reservados, sin bloquear nunca.
+
+    Metodología: Se consultan los tokens disponibles y se reservan tokens sin espera con
+    y sin reserva, y mediante request_with_rate_limit con reserva.
+
+    Salida esperada: Con reserva de un token solo se obtiene el primero de los dos tokens;
+    sin reserva se obtiene el segundo, y sin tokens libres la llamada en segundo plano
+    lanza TimeoutError sin esperar ni llamar a la API.
+    """
+    assert bucket.available() == pytest.approx(2, abs=0.1)
+    assert bucket.try_acquire(reserve=1)
+    assert not bucket.try_acquire(reserve=1)
+    assert bucket.try_acquire()
+    assert bucket.available() < 1
+
+    calls = []
+    with pytest.raises(TimeoutError):
+        request_with_rate_limit(lambda: calls.append(1) or {}, bucket, reserve=0)
+    assert not calls
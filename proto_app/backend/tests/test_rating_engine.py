@@ -0,0 +1,121 @@
+"""
+Bateria de pruebas para el modulo rating_engine del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+import numpy as np
+import pandas as pd
+from rating_engine import (
+    GROWTH_ATTRIBUTES,
+    RATIO_THRESHOLDS,
+    rate_history,
+    rate_universe,
+)
+import pytest
+
+
+def test_calificacion_universo():
+    """
+    Test ID: TU-RE-01
+    Requisito cubierto: RF-03: Calculo de la calificacion
+
+    Este test verifica que el motor de calificacion puntua a la vez varias empresas con
+    las reglas de la calificacion: GMGR amplificado, ratios respecto a su threshold,
+    ratios sin dato a 0, retorno de la prediccion normalizado y nota final entre 0 y 100.
+
+    Metodología: Se califica un universo de dos empresas, una con crecimiento constante
+    del 10% y buenos ratios, y otra con pocos informes, valores nulos y malos ratios.
+
+    Salida esperada: Las puntuaciones de cada atributo, componente y la nota final son
+    las calculadas a mano, y la tabla puede ordenarse por finalRate.
+    """
+    # Crecimiento constante del 10% segun la definicion (x_i - x_i-1) / x_i
+    steady = 100 / 0.9 ** np.arange(16)
+    history = pd.concat(
+        [
+            pd.DataFrame({attribute: steady for attribute in GROWTH_ATTRIBUTES}).assign(
+                ticker="AAA"
+            ),
+            pd.DataFrame(
+                {attribute: [1.0, np.nan, 2.0] for attribute in GROWTH_ATTRIBUTES}
+            ).assign(ticker="BBB"),
+        ],
+        ignore_index=True,
+    )
+    latest = pd.DataFrame(
+        {
+            "prediction": [120.0, 50.0],
+            "currentPrice": [100.0, 100.0],
+            "maxPrice": [200.0, 100.0],
+            "sharePrice": [100.0, 100.0],
+            "ROE": [0.3, -0.6],
+            "ROA": [0.025, np.nan],
+            "currentRatio": [2.0, 0.5],
+            "debtEquityRatio": [0.5, 4.0],
+            "bookValue": [50.0, np.nan],
+        },
+        index=pd.Index(["AAA", "BBB"], name="ticker"),
+    )
+
+    ratings = rate_universe(history, latest)
+
+    assert ratings.loc["AAA", "growth"] == pytest.approx(100)
+    assert ratings.loc["AAA", "ROA"] == pytest.approx(50)
+    assert ratings.loc["AAA", "bookValue"] == pytest.approx(50)
+    assert ratings.loc["AAA", "profitability"] == pytest.approx(75)
+    assert ratings.loc["AAA", "pricePredictionReturn"] == pytest.approx(100 / 6)
+    assert ratings.loc["AAA", "finalRate"] == 100
+
+    assert ratings.loc["BBB", list(GROWTH_ATTRIBUTES)].eq(0).all()
+    assert ratings.loc["BBB", "ROE"] == -100
+    assert ratings.loc["BBB", "financialHealth"] == pytest.approx(37.5)
+    assert ratings.loc["BBB", "pricePredictionReturn"] == 0
+    assert ratings.loc["BBB", "finalRate"] == 4
+
+    ranking = ratings.sort_values("finalRate", ascending=False)
+    assert list(ranking.index) == ["AAA", "BBB"]
+
+
+def test_historial_calificacion_ventanas_moviles():
+    """
+    Test ID: TU-RE-02
+    Requisito cubierto: RF-03: Calculo de la calificacion
+
+    Este test verifica que el historial de calificaciones calculado en una sola pasada
+    coincide con calificar cada trimestre solo con los datos disponibles en su fecha.
+
+    Metodología: Se genera una empresa con 30 informes y valores nulos, se calcula su
+    historial con ventanas moviles y se compara con rate_universe sobre cada prefijo de
+    los informes.
+
+    Salida esperada: Las calificaciones de todos los trimestres coinciden.
+    """
+    rng = np.random.default_rng(0)
+    history = pd.DataFrame(
+        {
+            attribute: (1 + rng.normal(0.02, 0.1, 30)).cumprod()
+            for attribute in GROWTH_ATTRIBUTES
+        }
+    )
+    history.iloc[rng.integers(0, 30, 5), 0] = np.nan
+    latest = pd.DataFrame(
+        {
+            "report": np.arange(30),
+            "prediction": rng.uniform(50, 150, 30),
+            "currentPrice": rng.uniform(50, 150, 30),
+            "sharePrice": rng.uniform(50, 150, 30),
+            **{ratio: rng.normal(0.5, 1, 30) for ratio in RATIO_THRESHOLDS},
+        }
+    )
+    latest["maxPrice"] = latest["currentPrice"].cummax()
+
+    ratings = rate_history(history, latest)
+
+    for quarter in range(30):
+        expected = rate_universe(
+            history.iloc[: quarter + 1].assign(ticker="AAA"),
+            latest.iloc[[quarter]].set_axis(["AAA"]),
+        )
+        pd.testing.assert_series_equal(
+            ratings.iloc[quarter], expected.iloc[0], check_names=False
+        )
@@ -0,0 +1,105 @@
+"""
+Bateria de pruebas para el modulo response_cache del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+from disk_cache import DiskCache
+from metrics import cache_requests
+from response_cache import ResponseCache
+import pytest
+
+
+@pytest.fixture
+def disk(tmp_path):
+    """
+    Fixture de pytest para crear una cache en disco vacia en un directorio temporal.
+    """
+    return DiskCache(str(tmp_path / "responses"))
+
+
+def test_cache_respuestas_versionada(disk):
+    """
+    Test ID: TU-RC-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que una respuesta guardada se obtiene de memoria o, en otro worker,
+    de disco, y que deja de devolverse al cambiar la version de los datos o invalidarla.
+
+    Metodología: Se guarda una respuesta en una cache y se consulta desde esa cache y
+    desde otra que comparte el disco, con la misma version, con otra version y tras
+    invalidar la clave.
+
+    Salida esperada: Las consultas con la misma version devuelven la respuesta y las
+    consultas con otra version, sin version o tras la invalidacion devuelven None.
+    """
+    cache = ResponseCache(disk, max_entries=4)
+    other_worker = ResponseCache(disk, max_entries=4)
+    key = ("AAPL", False)
+
+    cache.set(key, "v1", b'{"calificacion":57}')
+    assert cache.get(key, "v1") == b'{"calificacion":57}'
+    assert other_worker.get(key, "v1") == b'{"calificacion":57}'
+    assert cache.get(key, "v2") is None
+    assert cache.get(key, None) is None
+    assert other_worker.get(key, "v2") is None
+
+    cache.invalidate(key)
+    assert cache.get(key, "v1") is None
+    assert other_worker.get(key, "v1") is None
+
+
+def test_cache_respuestas_lru_ttl(disk):
+    """
+    Test ID: TU-RC-02
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que el nivel en memoria no supera su numero maximo de entradas,
+    expulsando la usada hace mas tiempo, y que cada nivel respeta su TTL.
+
+    Metodología: Se guardan mas respuestas que entradas en memoria, consultando la primera
+    entre medias, y se consultan las respuestas con TTL nulos.
+
+    Salida esperada: La respuesta consultada sigue en memoria, la menos usada solo esta en
+    disco, y con TTL nulos no se devuelve ninguna respuesta.
+    """
+    cache = ResponseCache(disk, max_entries=2)
+    cache.set(("AAPL", False), "v1", b"1")
+    cache.set(("MSFT", False), "v1", b"2")
+    assert cache.get(("AAPL", False), "v1") == b"1"
+    cache.set(("XOM", False), "v1", b"3")
+
+    assert list(cache._memory) == [("AAPL", False), ("XOM", False)]
+    assert cache.get(("MSFT", False), "v1") == b"2"
+
+    cache.memory_ttl = cache.disk_ttl = -1
+    assert cache.get(("AAPL", False), "v1") is None
+
+
+def test_cache_respuestas_comprobacion_sin_efectos(disk):
+    """
+    Test ID: TU-RC-03
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que comprobar si una respuesta esta al dia (como hace el
+    precalculo) no altera el LRU en memoria ni las metricas de la cache.
+
+    Metodología: Se llena la memoria de una cache y se comprueba una respuesta guardada
+    solo en disco, otra en memoria, una con otra version y una inexistente.
+
+    Salida esperada: Solo las respuestas con la version actual estan al dia, la memoria
+    conserva las mismas entradas en el mismo orden y las metricas no cambian.
+    """
+    other_worker = ResponseCache(disk)
+    other_worker.set(("TSLA", False), "v1", b"0")
+    cache = ResponseCache(disk, max_entries=2)
+    cache.set(("AAPL", False), "v1", b"1")
+    cache.set(("MSFT", False), "v1", b"2")
+    requests_before = cache_requests.render()
+
+    assert cache.is_fresh(("TSLA", False), "v1")
+    assert cache.is_fresh(("AAPL", False), "v1")
+    assert not cache.is_fresh(("MSFT", False), "v2")
+    assert not cache.is_fresh(("XOM", False), "v1")
+
+    assert list(cache._memory) == [("AAPL", False), ("MSFT", False)]
+    assert cache_requests.render() == requests_before
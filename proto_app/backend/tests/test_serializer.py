@@ -0,0 +1,112 @@
+"""
+Bateria de pruebas para el modulo serializer del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+import json
+import numpy as np
+import pandas as pd
+import serializer
+import pytest
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    """
+    Fixture de pytest para probar la serializacion con orjson y con el modulo json de la
+    libreria estandar (sin orjson).
+    """
+    if request.param == "json":
+        monkeypatch.setattr(serializer, "orjson", None)
+    elif serializer.orjson is None:
+        pytest.skip("orjson no esta instalado")
+    return request.param
+
+
+def test_serializacion_respuesta(backend):
+    """
+    Test ID: TU-SER-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que la respuesta se serializa a JSON valido con cualquiera de los
+    dos backends: valores no finitos como null, tipos de numpy como valores nativos y
+    fechas en formato ISO.
+
+    Metodología: Se serializa un diccionario anidado con NaN, infinito, escalares y arrays
+    de numpy, fechas y texto no ASCII, y se vuelve a leer con json.loads.
+
+    Salida esperada: El JSON se lee sin errores y contiene los valores esperados.
+    """
+    payload = {
+        "TIME_SERIES_MONTHLY_ADJUSTED": {"2024-01": 100.5, "2024-02": float("nan")},
+        "calificacion": {"finalRate": np.int64(57), "ROE": np.float64("inf")},
+        "predicciones": np.array([1.5, np.nan]),
+        "fecha": pd.Timestamp("2024-03-31"),
+        "descripcion": "Compañía",
+    }
+
+    data = json.loads(serializer.to_json(payload))
+
+    assert data == {
+        "TIME_SERIES_MONTHLY_ADJUSTED": {"2024-01": 100.5, "2024-02": None},
+        "calificacion": {"finalRate": 57, "ROE": None},
+        "predicciones": [1.5, None],
+        "fecha": "2024-03-31T00:00:00",
+        "descripcion": "Compañía",
+    }
+
+
+def test_serializacion_eventos(backend):
+    """
+    Test ID: TU-SER-02
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que las etapas se serializan como eventos de Server-Sent Events
+    validos: nombre del evento y una unica linea de datos en JSON.
+
+    Metodología: Se serializa un evento con un diccionario anidado que contiene texto con
+    saltos de linea.
+
+    Salida esperada: El evento tiene las lineas "event" y "data", termina en una linea en
+    blanco y sus datos se leen con json.loads.
+    """
+    payload = {"OVERVIEW": {"Description": "Linea 1\nLinea 2"}, "precio": np.nan}
+
+    event = serializer.to_sse("datos_financieros", payload)
+
+    assert event.endswith(b"\n\n")
+    name, data = event.decode("utf-8").rstrip("\n").split("\n")
+    assert name == "event: datos_financieros"
+    assert json.loads(data.removeprefix("data: ")) == {
+        "OVERVIEW": {"Description": "Linea 1\nLinea 2"},
+        "precio": None,
+    }
+
+
+def test_serializacion_respuesta_cacheada(backend):
+    """
+    Test ID: TU-SER-03
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que una respuesta ya serializada (de la cache) puede incluirse en
+    otro objeto JSON o en un evento sin decodificarla.
+
+    Metodología: Se incluye un JSON serializado en el estado de un trabajo, en un objeto
+    vacio y en un evento "fin".
+
+    Salida esperada: Los objetos resultantes son JSON validos con la respuesta en la clave
+    indicada, y el evento lleva la respuesta como datos.
+    """
+    cuerpo = serializer.to_json({"calificacion": {"finalRate": 57}})
+    estado = {"id": "abc", "estado": "completado"}
+
+    assert json.loads(serializer.embed_json(estado, "respuesta", cuerpo)) == {
+        **estado,
+        "respuesta": {"calificacion": {"finalRate": 57}},
+    }
+    assert json.loads(serializer.embed_json({}, "respuesta", cuerpo)) == {
+        "respuesta": {"calificacion": {"finalRate": 57}}
+    }
+    assert (
+        serializer.sse_event("fin", cuerpo) == b"event: fin\ndata: " + cuerpo + b"\n\n"
+    )
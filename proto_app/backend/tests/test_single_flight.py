@@ -0,0 +1,45 @@
+"""
+Bateria de pruebas para el modulo single_flight del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from single_flight import SingleFlight
+
+
+def test_agrupacion_peticiones_concurrentes():
+    """
+    Test ID: TU-SF-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que las peticiones concurrentes de un mismo ticker comparten un
+    unico calculo, mientras que las de tickers distintos se calculan por separado.
+
+    Metodología: Se lanzan varias llamadas simultaneas con la misma clave y una con una
+    clave distinta sobre una funcion lenta que cuenta sus ejecuciones.
+
+    Salida esperada: La funcion se ejecuta una vez por clave y todas las llamadas con la
+    misma clave reciben el mismo objeto como resultado.
+    """
+    coalescer = SingleFlight()
+    calls = []
+    lock = threading.Lock()
+
+    def compute(ticker):
+        with lock:
+            calls.append(ticker)
+        time.sleep(0.2)
+        return {"ticker": ticker}
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        futures = [
+            executor.submit(coalescer.do, ticker, compute, ticker)
+            for ticker in ["AAPL"] * 5 + ["MSFT"]
+        ]
+        results = [future.result() for future in futures]
+
+    assert sorted(calls) == ["AAPL", "MSFT"]
+    assert all(result is results[0] for result in results[:5])
+    assert not coalescer.in_flight("AAPL")
@@ -0,0 +1,91 @@
+"""
+Bateria de pruebas para el modulo tree_inference del backend
+"""
+
+# pylint: disable=C0413,E0401,E0402,W0621
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MaxAbsScaler, OneHotEncoder
+from tree_inference import CompiledEnsemble
+import pytest
+
+
+@pytest.fixture
+def pipeline_data():
+    """
+    Fixture de pytest para entrenar un pipeline con la misma estructura que gb_model.joblib
+    (imputacion, one-hot, escalado y gradient boosting) sobre datos sinteticos.
+    """
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(
+        rng.normal(size=(300, 3)) * [1, 1e3, 1e9], columns=["ROE", "P/E", "netIncome"]
+    )
+    data.iloc[::5, 1] = np.nan
+    data["symbol"] = rng.choice(["AAPL", "MSFT", "XOM", "JPM"], len(data))
+    data["sector"] = rng.choice(["TECHNOLOGY", "ENERGY"], len(data))
+    target = data["ROE"] * 10 + (data["symbol"] == "AAPL") * 5 + rng.normal(size=300)
+    pipeline = Pipeline(
+        [
+            (
+                "preprocessor",
+                ColumnTransformer(
+                    [
+                        ("num", SimpleImputer(), ["ROE", "P/E", "netIncome"]),
+                        (
+                            "cat",
+                            OneHotEncoder(handle_unknown="ignore"),
+                            ["symbol", "sector"],
+                        ),
+                    ]
+                ),
+            ),
+            ("scaler", MaxAbsScaler()),
+            (
+                "regressor",
+                GradientBoostingRegressor(
+                    n_estimators=40, max_depth=4, random_state=42
+                ),
+            ),
+        ]
+    )
+    pipeline.fit(data[:250], target[:250])
+    # Filas nuevas, con valores ausentes y un ticker no visto en el entrenamiento
+    new_data = data[250:].copy()
+    new_data.iloc[:3, 0] = np.nan
+    new_data.iloc[3:6, 3] = "NVDA"
+    return pipeline, new_data
+
+
+def test_inferencia_compilada_igual_a_predict(pipeline_data):
+    """
+    Test ID: TU-TI-01
+    Requisito cubierto: RNF-01: Rendimiento del backend
+
+    Este test verifica que la inferencia compilada del ensemble devuelve exactamente las
+    mismas predicciones que el predict del modelo, tanto con el preprocesado compilado
+    como cuando solo se compila el regresor.
+
+    Metodología: Se compila un pipeline entrenado y su regresor, y se comparan sus
+    predicciones con las de predict para una fila, para un lote y para ninguna fila.
+
+    Salida esperada: Las predicciones coinciden exactamente en todos los casos.
+    """
+    pipeline, new_data = pipeline_data
+    compiled = CompiledEnsemble.from_pipeline(pipeline)
+    assert compiled.columns is not None
+
+    for rows in (new_data[:1], new_data, new_data[:0]):
+        if len(rows):
+            assert np.array_equal(compiled.predict(rows), pipeline.predict(rows))
+        else:
+            assert len(compiled.predict(rows)) == 0
+
+    transformed = pipeline[:-1].transform(new_data)
+    regressor = CompiledEnsemble.from_pipeline(pipeline[-1])
+    assert np.array_equal(
+        regressor.predict(transformed), pipeline[-1].predict(transformed)
+    )
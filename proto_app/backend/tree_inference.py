@@ -0,0 +1,232 @@
+"""
+Modulo encargado de la inferencia compilada del modelo de gradient boosting: los arboles
+del ensemble se aplanan en arrays contiguos de numpy y se recorren de forma vectorizada
+para todas las filas y arboles a la vez.
+"""
+
+from dataclasses import dataclass
+import numpy as np
+from scipy import sparse
+
+# Tipo con el que los arboles de scikit-learn comparan las variables
+TREE_DTYPE = "float32"
+# Funciones de perdida cuya prediccion es directamente la suma del ensemble
+IDENTITY_LOSSES: tuple = ("squared_error", "absolute_error", "huber", "quantile")
+# Filas que recorren los arboles a la vez (los arrays intermedios caben en cache)
+CHUNK_ROWS: int = 256
+
+
+@dataclass
+class CompiledEnsemble:
+    # pylint: disable=R0902
+    """
+    Ensemble de arboles aplanado. Los nodos de todos los arboles se concatenan en los
+    mismos arrays; las hojas apuntan a si mismas, de modo que todas las filas pueden
+    avanzar el mismo numero de niveles (la profundidad maxima) sin comprobar si ya han
+    llegado a una hoja. Solo se calculan las variables que usa algun arbol.
+    :feature: variable que compara cada nodo (posicion dentro de used)
+    :threshold: umbral de cada nodo (se va a la izquierda si variable <= umbral)
+    :children: hijos de cada nodo, intercalados (izquierdo en 2*nodo, derecho en 2*nodo+1)
+    :value: valor de cada nodo (se usa el de las hojas)
+    :roots: nodo raiz de cada arbol
+    :depth: profundidad maxima de los arboles
+    :init: prediccion inicial del ensemble
+    :learning_rate: peso de la aportacion de cada arbol
+    :used: variables de entrada del regresor que usa algun arbol
+    :preprocessor: pasos previos del pipeline, si no se han podido compilar
+    :columns: por cada variable usada, (columna, "num", valor de imputacion) o
+    (columna, "cat", categoria), si se ha podido compilar el preprocesado
+    :scale: escala de cada variable usada (MaxAbsScaler), o None
+    :sparse_scale: si el escalado se aplica como en las matrices dispersas (x * 1/escala)
+    """
+
+    feature: np.ndarray
+    threshold: np.ndarray
+    children: np.ndarray
+    value: np.ndarray
+    roots: np.ndarray
+    depth: int
+    init: float
+    learning_rate: float
+    used: np.ndarray
+    preprocessor: any = None
+    columns: list = None
+    scale: np.ndarray = None
+    sparse_scale: bool = False
+
+    @classmethod
+    def from_pipeline(cls, model: any) -> "CompiledEnsemble":
+        """
+        Compila un GradientBoostingRegressor entrenado, o un pipeline que termine en el.
+        Lanza ValueError si el modelo no es compatible.
+        """
+        preprocessor = None
+        regressor = model
+        if hasattr(model, "steps"):
+            preprocessor = model[:-1] if len(model.steps) > 1 else None
+            regressor = model[-1]
+        if (
+            getattr(regressor, "loss", None) not in IDENTITY_LOSSES
+            or not hasattr(regressor, "estimators_")
+            or regressor.estimators_.shape[1] != 1
+        ):
+            raise ValueError(
+                "Solo se pueden compilar GradientBoostingRegressor entrenados"
+            )
+        if isinstance(regressor.init_, str) and regressor.init_ == "zero":
+            init = 0.0
+        elif hasattr(regressor.init_, "constant_"):
+            init = float(np.ravel(regressor.init_.constant_)[0])
+        else:
+            raise ValueError("Solo se admiten predicciones iniciales constantes")
+
+        trees = [estimator.tree_ for estimator in regressor.estimators_[:, 0]]
+        sizes = np.array([tree.node_count for tree in trees])
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        left = np.concatenate(
+            [tree.children_left + root for tree, root in zip(trees, roots)]
+        ).astype(np.intp)
+        right = np.concatenate(
+            [tree.children_right + root for tree, root in zip(trees, roots)]
+        ).astype(np.intp)
+        feature = np.concatenate([tree.feature for tree in trees])
+        # Las hojas (sin hijos) apuntan a si mismas
+        leaves = np.concatenate([tree.children_left == -1 for tree in trees])
+        nodes = np.arange(len(left))
+        left[leaves] = nodes[leaves]
+        right[leaves] = nodes[leaves]
+        feature[leaves] = feature[~leaves][0] if (~leaves).any() else 0
+        used, feature = np.unique(feature, return_inverse=True)
+
+        return cls(
+            feature=feature.astype(np.intp),
+            threshold=np.concatenate([tree.threshold for tree in trees]),
+            children=np.column_stack([left, right]).ravel(),
+            value=np.concatenate([tree.value[:, 0, 0] for tree in trees]),
+            roots=roots,
+            depth=max(tree.max_depth for tree in trees),
+            init=init,
+            learning_rate=float(regressor.learning_rate),
+            used=used,
+            preprocessor=preprocessor,
+        )
+
+    def __post_init__(self):
+        if self.preprocessor is not None and self.columns is None:
+            self.__compile_preprocessor()
+
+    def predict(self, X: any) -> np.ndarray:
+        # pylint: disable=C0103
+        """
+        Devuelve las predicciones para las filas de X, iguales a las de predict del modelo
+        original.
+        """
+        features = self.__features(X)
+        chunks = np.array_split(features, range(CHUNK_ROWS, len(features), CHUNK_ROWS))
+        return np.concatenate([self.__predict_features(chunk) for chunk in chunks])
+
+    # Metodos auxiliares
+
+    def __predict_features(self, features: np.ndarray) -> np.ndarray:
+        """
+        Recorre los arboles con las variables ya calculadas y devuelve las predicciones.
+        """
+        n_rows, n_features = features.shape
+
+        # Todas las filas recorren todos los arboles a la vez, un nivel por iteracion
+        offsets = (np.arange(n_rows) * n_features)[:, np.newaxis]
+        flat = features.ravel()
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        for _ in range(self.depth):
+            go_right = ~(flat[offsets + self.feature[node]] <= self.threshold[node])
+            node = self.children[2 * node + go_right]
+
+        # Suma secuencial (init + arbol 1 + arbol 2 ...) en el mismo orden que
+        # scikit-learn, para obtener exactamente los mismos resultados
+        contributions = np.empty((n_rows, len(self.roots) + 1))
+        contributions[:, 0] = self.init
+        contributions[:, 1:] = self.learning_rate * self.value[node]
+        return np.cumsum(contributions, axis=1)[:, -1]
+
+    def __features(self, X: any) -> np.ndarray:
+        # pylint: disable=C0103
+        """
+        Calcula las variables usadas por los arboles para las filas de X (en float32, el
+        tipo con el que compara scikit-learn).
+        """
+        if self.columns is None:
+            if self.preprocessor is not None:
+                X = self.preprocessor.transform(X)
+            if sparse.issparse(X):
+                return X.tocsc()[:, self.used].toarray().astype(TREE_DTYPE)
+            return np.asarray(X, dtype=np.float64)[:, self.used].astype(TREE_DTYPE)
+
+        features = np.empty((len(X), len(self.columns)))
+        values = {}
+        for j, (column, kind, param) in enumerate(self.columns):
+            if column not in values:
+                values[column] = X[column].to_numpy()
+            if kind == "num":
+                numeric = values[column].astype(np.float64)
+                features[:, j] = np.where(np.isnan(numeric), param, numeric)
+            else:
+                features[:, j] = values[column] == param
+        if self.scale is not None:
+            if self.sparse_scale:
+                features *= 1.0 / self.scale
+            else:
+                features /= self.scale
+        return features.astype(TREE_DTYPE)
+
+    def __compile_preprocessor(self):
+        """
+        Sustituye el preprocesado por operaciones por columna cuando es el del modelo del
+        backend: ColumnTransformer con SimpleImputer y OneHotEncoder, seguido o no de
+        MaxAbsScaler. Con cualquier otro preprocesado se mantiene su transform.
+        """
+        # pylint: disable=C0415
+        from sklearn.compose import ColumnTransformer
+        from sklearn.impute import SimpleImputer
+        from sklearn.preprocessing import MaxAbsScaler, OneHotEncoder
+
+        steps = [step for _, step in self.preprocessor.steps]
+        transformer = steps[0]
+        scaler = steps[1] if len(steps) == 2 else None
+        if (
+            not isinstance(transformer, ColumnTransformer)
+            or len(steps) > 2
+            or (scaler is not None and not isinstance(scaler, MaxAbsScaler))
+        ):
+            return
+
+        sources = []
+        for _, step, step_columns in transformer.transformers_:
+            if isinstance(step, str) and step == "drop":
+                continue
+            if not all(isinstance(column, str) for column in step_columns):
+                return
+            if isinstance(step, SimpleImputer) and not step.add_indicator:
+                # Las columnas sin ningun valor en el entrenamiento se descartan
+                sources += [
+                    (column, "num", fill)
+                    for column, fill in zip(step_columns, step.statistics_)
+                    if not np.isnan(fill)
+                ]
+            elif (
+                isinstance(step, OneHotEncoder)
+                and step.drop_idx_ is None
+                and not getattr(step, "_infrequent_enabled", False)
+            ):
+                sources += [
+                    (column, "cat", category)
+                    for column, categories in zip(step_columns, step.categories_)
+                    for category in categories
+                ]
+            else:
+                return
+
+        self.columns = [sources[i] for i in self.used]
+        if scaler is not None:
+            self.scale = scaler.scale_[self.used]
+            self.sparse_scale = bool(transformer.sparse_output_)
+        self.preprocessor = None
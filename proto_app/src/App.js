@@ -27,13 +27,8 @@ function App() {
   }, [data]);
 
   const buscarTicker = (ticker) => {
-    fetch("http://localhost:5000/api/datos", {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({ ticker: ticker }),
-    })
+    // GET para que el navegador guarde la respuesta y la revalide con su ETag
+    fetch(`http://localhost:5000/api/datos/${encodeURIComponent(ticker)}`)
       .then((response) => response.json())
       .then((responseData) => {
         if (!responseData.Error) {
@@ -1,7 +1,12 @@
 import requests
 import json
-import time
+import sys
 import pandas as pd
+from pathlib import Path
+
+# Limitador de llamadas compartido con el backend (mismo fichero de estado)
+sys.path.append(str(Path(__file__).resolve().parents[1] / "proto_app" / "backend"))
+from rate_limiter import request_with_rate_limit
 
 # Obtenemos la clave de la API de AlphaVantage
 with open(f"config.json", "r") as file:
@@ -14,14 +19,8 @@ def obtain_sector_industry(symbol: str):
     Función para la obtención del sector e industria principales donde opera la compañia
     """
     url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={symbol}&apikey={alphavantage_key}"
-    r = requests.get(url)
-    data = r.json()
-    # Caso de superar el limite de acccesos por minuto de la API
-    while "Note" in data:
-        print("Waiting for 20 seconds for AlphaVantage API limit!")
-        time.sleep(20)
-        r = requests.get(url)
-        data = r.json()
+    # Cada intento espera a tener un token del limitador compartido de la API
+    data = request_with_rate_limit(lambda: requests.get(url, timeout=60).json())
     try:
         result = (data["Sector"], data["Industry"])
     except KeyError:  # Caso en el que no tenemos la informacion
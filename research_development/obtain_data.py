@@ -1,11 +1,17 @@
 import finnhub
 import json
+import sys
 import requests
 import pandas as pd
-import time
 from datetime import datetime, timedelta
+from pathlib import Path
 from yahoo_fin import stock_info as si
 
+# Limitador de llamadas compartido con el backend (mismo fichero de estado)
+sys.path.append(str(Path(__file__).resolve().parents[1] / "proto_app" / "backend"))
+from rate_limiter import request_with_rate_limit
+from data_manager_aux import closest_prices_from_df as backend_closest_prices
+
 # Obtenemos las claves para las apis
 with open(f"config.json", "r") as file:
     config = json.load(file)
@@ -14,20 +20,16 @@ alphavantage_key = config["Alphavantage_key"]
 finnhub_key = config["Finnhub_key"]
 
 
-def closest_price_from_df(date_str: str, df_prices: pd.DataFrame(), symbol: str):
+def closest_prices_from_df(
+    fechas: pd.DatetimeIndex, df_prices: pd.DataFrame(), symbol: str
+):
     """
-    Funcion para obtener la fila del dataframe de precios con la fecha mas cercana al dia indicado
+    Funcion para obtener, de una sola vez, el precio con la fecha mas cercana a cada una de
+    las fechas indicadas (NaN si se aleja mas de 40 dias)
     """
-    # Pasando la fecha e indice a datetime
+    # Pasando el indice a datetime
     df_prices.index = pd.to_datetime(df_prices.index)
-    fecha_objetivo = pd.to_datetime(date_str)
-    # Calcular la diferencia absoluta entre la fecha objetivo y todas las fechas en el indice
-    diferencias = abs(df_prices.index - fecha_objetivo)
-    # Encuentra la fecha con la diferencia minima, menor a 40 dias
-    fecha_mas_cercana = df_prices.index[diferencias.argmin()]
-    if abs(fecha_objetivo - fecha_mas_cercana) > pd.Timedelta(days=40):
-        return None
-    return df_prices.loc[fecha_mas_cercana, symbol]
+    return backend_closest_prices(df_prices[symbol], fechas)
 
 
 def calcular_fundamentales(operacion: str, claves: tuple, datos: dict):
@@ -52,14 +54,8 @@ def get_prices(ticker: str):
     Funcion para la obtencion del historial de precios de un ticker
     """
     url = f"https://www.alphavantage.co/query?function=TIME_SERIES_MONTHLY_ADJUSTED&outputsize=full&symbol={ticker}&apikey={alphavantage_key}"
-    r = requests.get(url)
-    prices = r.json()
-    # Caso de superar el limite de acccesos por minuto de la API
-    while "Note" in prices:
-        print("Waiting for 20 seconds for AlphaVantage API limit!")
-        time.sleep(20)
-        r = requests.get(url)
-        prices = r.json()
+    # Cada intento espera a tener un token del limitador compartido de la API
+    prices = request_with_rate_limit(lambda: requests.get(url, timeout=60).json())
     return prices
 
 
@@ -260,17 +256,21 @@ def map_fundamentals(ticker, df_prices, remove_prefix="us-gaap_"):
         date = quarterly_fundamentals["endDate"][:-9]
         datos_mapeados["reportedCurrency"] = datos_calculos["unit"]
         datos_mapeados["symbol"] = ticker
-        datos_mapeados["sharePrice"] = closest_price_from_df(date, df_prices, ticker)
-        # Variable objetivo
-        date_1y = date = datetime.strptime(date, "%Y-%m-%d")
-        date_1y += timedelta(days=365)  # +1 year
-        date_1y = date_1y.strftime("%Y-%m-%d")
-        datos_mapeados["1y_sharePrice"] = closest_price_from_df(
-            date_1y, df_prices, ticker
-        )
+        date = datetime.strptime(date, "%Y-%m-%d")
 
         result[date] = datos_mapeados
 
+    # Precios al cierre del trimestre y un año despues (variable objetivo) en una sola busqueda
+    fechas = pd.DatetimeIndex(list(result.keys()))
+    precios = closest_prices_from_df(
+        fechas.append(fechas + timedelta(days=365)), df_prices, ticker
+    )
+    for datos_mapeados, precio, precio_1y in zip(
+        result.values(), precios[: len(fechas)], precios[len(fechas) :]
+    ):
+        datos_mapeados["sharePrice"] = precio
+        datos_mapeados["1y_sharePrice"] = precio_1y
+
     return result
 
 
@@ -1,6 +1,6 @@
 #!/bin/bash
 
-TARGET_FILES="./proto_app/backend/app.py ./proto_app/backend/data_manager.py ./proto_app/backend/data_manager_aux.py"
+TARGET_FILES="./proto_app/backend/app.py ./proto_app/backend/data_manager.py ./proto_app/backend/data_manager_aux.py ./proto_app/backend/disk_cache.py ./proto_app/backend/rate_limiter.py ./proto_app/backend/single_flight.py ./proto_app/backend/model_pool.py ./proto_app/backend/tree_inference.py ./proto_app/backend/rating_engine.py ./proto_app/backend/serializer.py ./proto_app/backend/http_compression.py ./proto_app/backend/job_manager.py ./proto_app/backend/response_cache.py ./proto_app/backend/metrics.py ./proto_app/backend/log_config.py ./proto_app/backend/prefetch.py"
 
 PYLINT_OUTPUT=$(pylint $TARGET_FILES)
 EXIT_CODE=$?